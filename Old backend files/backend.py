@@ -1,9 +1,28 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
 from geopy.distance import geodesic
-import geopandas as gpd
 from shapely.geometry import Point
+import os
+import sys
+import time
+import numpy as np
+
+# The parsing and storage helpers live next to the other scripts in PythonScripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "PythonScripts"))
+from parseHurricaneData import OUTPUT_ERRORS_CSV_FILE, parse_hurdat2_columns
+from trackStore import TRACK_STORE_DIR, write_track_store, open_track_store, track_minutes
+from stormModel import load_storms
+from instrumentation import RequestMetrics, current_report, stage
+import floridaGeometry
+from climatologyStats import CATEGORIES, REGIONS, build_cube, store_season_span
+from stormAnalogs import build_analog_index, find_analogs
+from responseCache import (
+    CACHE_CONTROL, ResponseCache, accepts_gzip, dataset_version, etag_matches, gzip_etag, make_etag,
+)
+import json
 
 app = FastAPI()
 
@@ -15,17 +34,42 @@ app.add_middleware(
     allow_headers=["*"],  
 )
 
+# Per-request timings, exposed on /metrics
+request_metrics = RequestMetrics()
+
+# The route label of requests that match no endpoint (404s)
+UNMATCHED_ROUTE = "<unmatched>"
+
+@app.middleware("http")
+async def record_request_timing(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+
+    # Use the route template (not the raw URL) so every storm id does not become its own series,
+    # and one shared label for unmatched paths so scanners and typos cannot grow the metrics without bound
+    route = request.scope.get("route")
+    path = route.path if route is not None else UNMATCHED_ROUTE
+    request_metrics.observe(request.method, path, response.status_code, time.perf_counter() - start)
+    return response
+
 HURDAT2_FILE = "Hurricanes.txt"
+TRACK_STORE_DIR = os.environ.get("TRACK_STORE_DIR", TRACK_STORE_DIR)
+LANDFALLS_CSV = os.environ.get("LANDFALLS_CSV", "PythonScripts/florida_landfalls_using_L.csv")
+CLIMATOLOGY_CUBE = os.environ.get("CLIMATOLOGY_CUBE", "PythonScripts/climatology_cube.npz")
+ANALOG_INDEX = os.environ.get("ANALOG_INDEX", "PythonScripts/analog_index.npz")
 
-# Load Florida boundary from shapefile
+# Florida boundary, loaded from the shapefile on the first landfall request
 admin1_shapefile = "ne_10m_admin_1_states_provinces.shp"  # Update with the correct path
-states = gpd.read_file(admin1_shapefile)
-florida = states[states["name"] == "Florida"]
+
+# Settings of the landfall detection, part of the ETag so changing them invalidates cached responses
+LANDFALL_MIN_YEAR = 1900
+WIND_DROP_RATIO = 0.8
+INLAND_DISTANCE_MILES = 50
 
 def is_on_land(latitude, longitude):
     """ Check if a given latitude and longitude is inside Florida. """
     point = Point(longitude, latitude)
-    return florida.geometry.contains(point).any()
+    return floridaGeometry.florida_shape(admin1_shapefile).contains(point)
 
 def calculate_distance(coord1, coord2):
     """Returns distance in miles between two (lat, lon) coordinates, ensuring valid range."""
@@ -42,128 +86,196 @@ def calculate_distance(coord1, coord2):
 
     return geodesic(coord1, coord2).miles  # Always return a valid distance
 
-def parse_hurdat2():
-    """ Reads HURDAT2 file and returns parsed storm data. """
-    with open(HURDAT2_FILE, "r") as file:
-        lines = file.readlines()
-
-    parsed_data = []
-    current_storm = None
-
-    for line in lines:
-        parts = [p if p != "" else " " for p in line.strip().split(",")]
-
-        if len(parts) == 4:
-            if current_storm and current_storm["Entries"]:
-                parsed_data.append(current_storm)
-
-            try:
-                current_storm = {
-                    "Basin": parts[0][:2],
-                    "Cyclone_Number": parts[0][2:4],
-                    "Year": parts[0][4:8],
-                    "Name": parts[1].strip(),
-                    "Data_Count": int(parts[2].strip()),
-                    "Entries": []
-                }
-            except ValueError:
-                current_storm = None
-                continue
-
-        elif len(parts) >= 8 and current_storm:
-            try:
-                date = parts[0].strip()
-                time = parts[1].strip()
-                status = parts[3].strip()
-
-                lat_value = float(parts[4][:-1])
-                lat_direction = parts[4][-1]
-                lon_value = float(parts[5][:-1])
-                lon_direction = parts[5][-1]
-
-                if lon_value > 180:
-                    lon_value -= 360
-
-                latitude = lat_value if lat_direction == "N" else -lat_value
-                longitude = -lon_value if lon_direction == "W" else lon_value
-
-                if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
-                    continue
-
-                max_wind_speed = int(parts[6].strip()) if parts[6].strip().isdigit() else 0
-                min_pressure = int(parts[7].strip()) if len(parts) > 7 and parts[7].strip().isdigit() else None
-
-                entry = {
-                    "Date": date,
-                    "Time": time,
-                    "Status": status,
-                    "Latitude": latitude,
-                    "Longitude": longitude,
-                    "Max_Wind_Speed": max_wind_speed,
-                    "Min_Pressure": min_pressure
-                }
-
-                current_storm["Entries"].append(entry)
-
-            except ValueError:
-                continue
-
-    if current_storm and current_storm["Entries"]:
-        parsed_data.append(current_storm)
-
-    return parsed_data
+def load_storms_from_store():
+    """ Opens the memory-mapped track store (building it from HURDAT2 on first run) and returns Storm objects. """
+    if not os.path.exists(os.path.join(TRACK_STORE_DIR, "meta.json")):
+        with stage("parse"):
+            df, errors = parse_hurdat2_columns(HURDAT2_FILE, validate=True)
+        if len(errors):
+            errors.to_csv(OUTPUT_ERRORS_CSV_FILE, index=False)
+            print(f"{len(errors)} problems found in {HURDAT2_FILE}, saved to {OUTPUT_ERRORS_CSV_FILE}")
+        with stage("build_store", rows=len(df)):
+            write_track_store(df, TRACK_STORE_DIR, source=HURDAT2_FILE)
+    with stage("load_store"):
+        return load_storms(open_track_store(TRACK_STORE_DIR))
+
+# Storms are loaded once per worker, their tracks stay as views into the shared memory-mapped store
+storms = load_storms_from_store()
 
 @app.get("/api/florida-landfalls")
-def get_florida_landfalls():
+def get_florida_landfalls(request: Request):
     """ Detect hurricanes that made landfall in Florida **without relying on 'L' indicator**. """
-    parsed_data = parse_hurdat2()
+    return cached_json(request, detect_florida_landfalls)
+
+def detect_florida_landfalls():
     florida_landfalls = []
 
-    for storm in parsed_data:
-        if int(storm["Year"]) >= 1900:
-            previous_entry = None
-
-            for entry in storm["Entries"]:
-                if previous_entry:
-                    offshore = not is_on_land(previous_entry["Latitude"], previous_entry["Longitude"])
-                    on_land = is_on_land(entry["Latitude"], entry["Longitude"])
-
-                    # Detecting a sudden wind speed drop (storm weakens)
-                    wind_speed_drop = (
-                        previous_entry["Max_Wind_Speed"] > 0 and
-                        entry["Max_Wind_Speed"] < previous_entry["Max_Wind_Speed"] * 0.8  # 20% drop
-                    )
-
-                    # Ensuring the storm moves inland (not just passing)
-                    inland_movement = (
-                        calculate_distance(
-                            (entry["Latitude"], entry["Longitude"]),
-                            (previous_entry["Latitude"], previous_entry["Longitude"])
-                        ) < 50  # Hurricane should slow down after landfall
-                    )
-
-                    # If a hurricane moves from offshore to land and weakens, it's a landfall
-                    if offshore and on_land and (wind_speed_drop or inland_movement):
-                        florida_landfalls.append({
-                            "Hurricane": storm["Name"],
-                            "Year": storm["Year"],
-                            "Date": entry["Date"],
-                            "Time": entry["Time"],
-                            "Latitude": entry["Latitude"],
-                            "Longitude": entry["Longitude"],
-                            "Max Wind Speed (knots)": entry["Max_Wind_Speed"]
-                        })
-                        break  # Only capture the first landfall
-
-                previous_entry = entry  # Update for next iteration
+    for storm in storms:
+        if storm.year >= LANDFALL_MIN_YEAR:
+            for previous_entry, entry in storm.segments():
+                _, _, prev_latitude, prev_longitude, prev_wind, _ = previous_entry
+                date, time, latitude, longitude, max_wind, _ = entry
+
+                offshore = not is_on_land(prev_latitude, prev_longitude)
+                on_land = is_on_land(latitude, longitude)
+
+                # Detecting a sudden wind speed drop (storm weakens)
+                wind_speed_drop = (
+                    prev_wind > 0 and
+                    max_wind < prev_wind * WIND_DROP_RATIO  # 20% drop
+                )
+
+                # Ensuring the storm moves inland (not just passing)
+                inland_movement = (
+                    calculate_distance(
+                        (latitude, longitude),
+                        (prev_latitude, prev_longitude)
+                    ) < INLAND_DISTANCE_MILES  # Hurricane should slow down after landfall
+                )
+
+                # If a hurricane moves from offshore to land and weakens, it's a landfall
+                if offshore and on_land and (wind_speed_drop or inland_movement):
+                    florida_landfalls.append({
+                        "Hurricane": storm.name,
+                        "Year": str(storm.year),
+                        "Date": str(date),
+                        "Time": f"{time:04d}",
+                        "Latitude": round(latitude, 1),
+                        "Longitude": round(longitude, 1),
+                        "Max Wind Speed (knots)": max(max_wind, 0)
+                    })
+                    break  # Only capture the first landfall
 
     print(f"Total Florida Landfalls Found: {len(florida_landfalls)}")
     return florida_landfalls
 
 @app.get("/api/hurricanes")
-def get_hurricanes():
+def get_hurricanes(request: Request):
     """ Returns all hurricane data. """
-    return parse_hurdat2()
+    return cached_json(request, lambda: [storm.to_dict() for storm in storms])
+
+# Landfall climatology cube, brought up to date with the landfall set once per worker
+# The landfall set covers the seasons up to the last one in the store, years without a landfall count as zeros
+with stage("load_climatology"):
+    climatology, _ = build_cube(LANDFALLS_CSV, CLIMATOLOGY_CUBE, store_season_span(TRACK_STORE_DIR))
+
+# The data is loaded once per worker, so its version (store, climatology and detection settings) is fixed too
+DATASET_VERSION = dataset_version(
+    [os.path.join(TRACK_STORE_DIR, "meta.json")],
+    extra=json.dumps({
+        "climatology": {str(year): value for year, value in climatology.year_hashes.items()},
+        "seasons": list(climatology.seasons()),
+        "landfalls": [LANDFALL_MIN_YEAR, WIND_DROP_RATIO, INLAND_DISTANCE_MILES, admin1_shapefile],
+    }, sort_keys=True),
+)
+
+# Serialized and compressed bodies of the most requested path and parameter combinations
+response_cache = ResponseCache()
+
+def cached_json(request, build):
+    """ JSON response of build() with a strong ETag, answered with 304 or from the cache when possible. """
+    etag = make_etag(DATASET_VERSION, request.url.path, request.query_params.multi_items())
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    matched = etag_matches(request.headers.get("if-none-match"), etag)
+    if matched:
+        response_cache.count_not_modified()
+        headers["ETag"] = matched
+        return Response(status_code=304, headers=headers)
+
+    entry = response_cache.get(etag, build)
+    if entry.gzip_body is not None and accepts_gzip(request.headers.get("accept-encoding")):
+        headers["ETag"] = gzip_etag(etag)
+        headers["Content-Encoding"] = "gzip"
+        return Response(entry.gzip_body, media_type="application/json", headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+def climatology_filters(category, region):
+    """ Validates the climatology query parameters and returns (minimum category index, region). """
+    if category not in CATEGORIES:
+        raise HTTPException(status_code=400, detail=f"category must be one of {CATEGORIES}")
+    if region is not None and region not in REGIONS:
+        raise HTTPException(status_code=400, detail=f"region must be one of {REGIONS}")
+    return CATEGORIES.index(category), region
+
+@app.get("/api/climatology")
+def get_climatology(request: Request, by: str = "decade", category: str = "TS", region: str = None,
+                    min_year: int = None, max_year: int = None):
+    """ Florida landfall counts rolled up by year, decade, month, category or region. """
+    min_category, region = climatology_filters(category, region)
+    try:
+        return cached_json(request, lambda: {
+            "by": by,
+            "category": category,
+            "region": region,
+            "counts": climatology.rollup(by, min_category, region, min_year, max_year),
+        })
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+@app.get("/api/climatology/return-period")
+def get_return_period(request: Request, category: str = "TS", region: str = None,
+                      min_year: int = None, max_year: int = None):
+    """ Empirical return period and trend of Florida landfalls at or above a category. """
+    min_category, region = climatology_filters(category, region)
+    try:
+        return cached_json(request, lambda: {
+            "category": category,
+            "region": region,
+            **climatology.return_period(min_category, region, min_year, max_year),
+            "trend": climatology.trend(min_category, region, min_year, max_year),
+        })
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+# Track window index for the analog search, brought up to date with the track store once per worker
+with stage("load_analogs"):
+    analog_index, _ = build_analog_index(TRACK_STORE_DIR, ANALOG_INDEX)
+
+class TrackFix(BaseModel):
+    date: int                # YYYYMMDD
+    time: int                # HHMM
+    latitude: float
+    longitude: float
+    max_wind: float = None
+
+class AnalogQuery(BaseModel):
+    track: list[TrackFix]
+    k: int = 10
+    exclude: str = None      # storm id to leave out, e.g. the storm the track belongs to
+
+@app.post("/api/analogs")
+def get_analogs(query: AnalogQuery):
+    """ Historical storms whose track looked most like the given (partial) track. """
+    if not 1 <= query.k <= 100:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 100")
+    track = query.track
+    try:
+        minutes = track_minutes([fix.date for fix in track], [fix.time for fix in track])
+        if np.isnan(minutes).any():
+            raise ValueError("every fix needs a valid date (YYYYMMDD) and time (HHMM)")
+        analogs = find_analogs(
+            analog_index,
+            [fix.latitude for fix in track],
+            [fix.longitude for fix in track],
+            [float("nan") if fix.max_wind is None or fix.max_wind < 0 else fix.max_wind for fix in track],
+            minutes, query.k, query.exclude,
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return {"k": query.k, "analogs": analogs}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """ Request and startup timings in the Prometheus text format. """
+    return request_metrics.render(current_report)
+
+@app.get("/metrics/report")
+def get_metrics_report():
+    """ Startup stages and request timings of this worker as JSON. """
+    report = current_report.to_dict()
+    report["requests"] = request_metrics.to_dict()
+    report["response_cache"] = response_cache.to_dict()
+    return report
 
 if __name__ == "__main__":
     uvicorn.run("backend:app", host="0.0.0.0", port=8000, timeout_keep_alive=120)
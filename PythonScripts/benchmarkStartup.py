@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+#-----------------------------------------------------------------------------------------------------------
+# Startup benchmark for the pipeline modules.
+# Every module is imported in a fresh interpreter several times; the script reports the median import time
+# and fails if an import pulls in one of the heavy dependencies (they must only load on first use) or takes
+# longer than the budget.
+#
+# Usage: python PythonScripts/benchmarkStartup.py [--repeat 5] [--budget 1.0]
+# -----------------------------------------------------------------------------------------------------------
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+MODULES = [
+    "instrumentation",
+    "parseHurricaneData",
+    "trackStore",
+    "stormModel",
+    "ingestHurricaneData",
+    "floridaGeometry",
+    "extractAllLandFalls",
+    "extractFloridaLandfallsUsingL",
+    "extractFloridaLandFallsWithoutL",
+    "machineLearningApproach",
+    "resampleTracks",
+    "windSwath",
+    "countyExposure",
+    "climatologyStats",
+    "stormAnalogs",
+    "reconcileLandfalls",
+    "responseCache",
+    "hurricanePipeline",
+]
+
+# Dependencies that must not be imported until they are actually needed
+HEAVY_MODULES = ["geopandas", "shapely", "geopy", "sklearn", "pyogrio", "fiona"]
+
+# Imports the module in a fresh interpreter and prints the import time and the heavy modules it loaded
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print(json.dumps({{"seconds": seconds, "heavy": heavy}}))
+"""
+
+
+def measure(module, repeat):
+    samples = []
+    heavy = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=SCRIPTS_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append(result["seconds"])
+        heavy = result["heavy"]
+    return statistics.median(samples), heavy
+
+
+# Function to measure the bare interpreter startup, so module numbers can be read relative to it
+def interpreter_baseline(repeat):
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", "import time; start = time.perf_counter(); import json; print(time.perf_counter() - start)"],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        samples.append(float(output))
+    return statistics.median(samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the import time of the pipeline modules.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--budget", type=float, default=1.0, help="Maximum median import time in seconds")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    print(f"interpreter baseline: {interpreter_baseline(args.repeat) * 1000:.1f} ms")
+    print(f"{'module':<36}{'median ms':>12}  heavy imports")
+    failed = False
+    for module in args.modules:
+        seconds, heavy = measure(module, args.repeat)
+        too_slow = seconds > args.budget
+        failed = failed or too_slow or bool(heavy)
+        flag = "  SLOW" if too_slow else ""
+        print(f"{module:<36}{seconds * 1000:>12.1f}  {', '.join(heavy) or '-'}{flag}")
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from trackStore import decode_coordinates, wrap_longitudes
+
+#-----------------------------------------------------------------------------------------------------------
+# Landfall climatology on a small precomputed cube: year x month x category x region.
+# The cube is built from the landfall set when it is ingested (one count per landfall row) and every query -
+# rollups, empirical return periods, trends - is a sum over cube axes, so it answers in microseconds.
+# Rebuilding is incremental: only seasons whose landfall rows are new or changed are recounted.
+# The cube also records the span of seasons the landfall set was detected over, so seasons without any
+# landfall count as zeros in rates, return periods and trends.
+#
+# Usage: python PythonScripts/climatologyStats.py [landfalls_csv] [--cube climatology_cube.npz] [--by decade]
+#        [--seasons 1900 2023]
+# -----------------------------------------------------------------------------------------------------------
+
+# The landfall set the cube is built from and the file the cube is saved to
+LANDFALLS_CSV_FILE = "PythonScripts/florida_landfalls_using_L.csv"
+CUBE_FILE = "PythonScripts/climatology_cube.npz"
+
+# Saffir-Simpson categories by maximum sustained wind in knots (TS covers tropical depressions and storms)
+CATEGORIES = ["TS", "1", "2", "3", "4", "5"]
+CATEGORY_MIN_WIND = [0, 64, 83, 96, 113, 137]
+
+# Florida coastal regions, these are rough latitude/longitude splits of the coastline
+REGIONS = ["Panhandle", "North", "Central", "South"]
+PANHANDLE_MAX_LON = -83.5
+NORTH_MIN_LAT = 28.5
+SOUTH_MAX_LAT = 26.5
+
+MONTHS = list(range(1, 13))
+
+# The landfall sets are detected from this season on (see extractFloridaLandfallsUsingL.py)
+FIRST_LANDFALL_SEASON = 1900
+
+# Longest span of years a query may cover, the selection is allocated per year
+MAX_SPAN_YEARS = 1000
+
+
+# Function to map wind speeds (knots) to category indices
+def wind_category(winds):
+    winds = np.nan_to_num(np.asarray(winds, dtype=np.float64), nan=0.0)
+    return np.searchsorted(CATEGORY_MIN_WIND, winds, side="right") - 1
+
+
+# Function to map coordinates to region indices
+def coastal_region(latitudes, longitudes):
+    return np.select(
+        [longitudes < PANHANDLE_MAX_LON, latitudes >= NORTH_MIN_LAT, latitudes >= SOUTH_MAX_LAT],
+        [0, 1, 2],
+        default=3,
+    )
+
+
+# Function to turn the landfall CSV columns into (year, month, category, region) index columns
+def landfall_keys(df):
+    dates = pd.to_numeric(df["Date"], errors="coerce").fillna(0).astype(np.int64).to_numpy()
+    latitudes = decode_coordinates(df["Latitude"]).to_numpy()
+    longitudes = wrap_longitudes(decode_coordinates(df["Longitude"])).to_numpy()
+    return pd.DataFrame({
+        "Year": dates // 10000,
+        "Month": dates // 100 % 100,
+        "Category": wind_category(pd.to_numeric(df["Max_Wind_Speed"], errors="coerce")),
+        "Region": coastal_region(latitudes, longitudes),
+    })
+
+
+class ClimatologyCube:
+    """ Landfall counts indexed by [year - first_year, month - 1, category, region].
+
+    season_span is the (first, last) season the landfall set covers, None when only the years with a
+    landfall are known.
+    """
+
+    __slots__ = ("counts", "first_year", "year_hashes", "season_span")
+
+    def __init__(self, counts, first_year, year_hashes, season_span=None):
+        self.counts = counts
+        self.first_year = first_year
+        self.year_hashes = year_hashes
+        self.season_span = season_span
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros((0, len(MONTHS), len(CATEGORIES), len(REGIONS)), dtype=np.int32), 0, {})
+
+    @property
+    def years(self):
+        return np.arange(self.first_year, self.first_year + len(self.counts))
+
+    def seasons(self):
+        """ First and last season of the dataset, by default the years the cube covers. """
+        if self.season_span is not None:
+            return self.season_span
+        return self.first_year, self.first_year + len(self.counts) - 1
+
+    def save(self, path=CUBE_FILE):
+        temp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temp_path, counts=self.counts, first_year=self.first_year,
+                 year_hashes=json.dumps(self.year_hashes), season_span=json.dumps(self.season_span))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path=CUBE_FILE):
+        with np.load(path) as data:
+            year_hashes = {int(year): value for year, value in json.loads(str(data["year_hashes"])).items()}
+            span = json.loads(str(data["season_span"])) if "season_span" in data else None
+            return cls(data["counts"], int(data["first_year"]), year_hashes, tuple(span) if span else None)
+
+    def update(self, landfalls_df):
+        """ Recount only the seasons that are new or whose landfall rows changed. Returns the years recounted. """
+        keys = landfall_keys(landfalls_df)
+        keys = keys[(keys["Year"] > 0) & keys["Month"].between(1, 12)]
+        row_hashes = pd.util.hash_pandas_object(landfalls_df.loc[keys.index].astype(str), index=False)
+        season_hashes = row_hashes.groupby(keys["Year"].to_numpy()).sum().astype(np.uint64).astype(str).to_dict()
+
+        changed = sorted(
+            year for year in set(season_hashes) | set(self.year_hashes)
+            if season_hashes.get(year) != self.year_hashes.get(year)
+        )
+        if not changed:
+            return []
+
+        # Grow the year axis to cover every season seen so far
+        all_years = list(season_hashes) + ([self.first_year, self.years[-1]] if len(self.counts) else [])
+        first_year, last_year = min(all_years), max(all_years)
+        counts = np.zeros((last_year - first_year + 1,) + self.counts.shape[1:], dtype=np.int32)
+        if len(self.counts):
+            offset = self.first_year - first_year
+            counts[offset:offset + len(self.counts)] = self.counts
+
+        # Recount the changed seasons in one scatter-add
+        counts[np.asarray(changed) - first_year] = 0
+        subset = keys[keys["Year"].isin(changed)]
+        np.add.at(counts, (subset["Year"] - first_year, subset["Month"] - 1, subset["Category"], subset["Region"]), 1)
+
+        self.counts, self.first_year = counts, first_year
+        self.year_hashes = {year: season_hashes[year] for year in season_hashes}
+        return changed
+
+    def _select(self, min_category=0, region=None, min_year=None, max_year=None):
+        """ Counts of every year from min_year to max_year (default: the dataset seasons), zeros outside the cube. """
+        first_season, last_season = self.seasons()
+        min_year = first_season if min_year is None else min_year
+        max_year = last_season if max_year is None else max_year
+        if max_year - min_year + 1 > MAX_SPAN_YEARS:
+            raise ValueError(f"min_year to max_year may cover at most {MAX_SPAN_YEARS} years")
+        counts = np.zeros((max(max_year - min_year + 1, 0),) + self.counts.shape[1:], dtype=self.counts.dtype)
+        start, stop = max(min_year, self.first_year), min(max_year, self.first_year + len(self.counts) - 1)
+        if stop >= start:
+            counts[start - min_year:stop - min_year + 1] = self.counts[start - self.first_year:stop - self.first_year + 1]
+        counts = counts[:, :, min_category:]
+        if region is not None:
+            counts = counts[..., [REGIONS.index(region)]]
+        return counts, min_year
+
+    def rollup(self, by="decade", min_category=0, region=None, min_year=None, max_year=None):
+        """ Landfall counts grouped by "year", "decade", "month", "category" or "region". """
+        counts, first_year = self._select(min_category, region, min_year, max_year)
+        if by == "year":
+            totals = counts.sum(axis=(1, 2, 3))
+            return {int(first_year + i): int(value) for i, value in enumerate(totals)}
+        if by == "decade":
+            totals = counts.sum(axis=(1, 2, 3))
+            decades = (first_year + np.arange(len(totals))) // 10 * 10
+            result = {}
+            for decade, value in zip(decades.tolist(), totals.tolist()):
+                result[decade] = result.get(decade, 0) + value
+            return result
+        if by == "month":
+            return dict(zip(MONTHS, counts.sum(axis=(0, 2, 3)).tolist()))
+        if by == "category":
+            return dict(zip(CATEGORIES[min_category:], counts.sum(axis=(0, 1, 3)).tolist()))
+        if by == "region":
+            names = REGIONS if region is None else [region]
+            return dict(zip(names, counts.sum(axis=(0, 1, 2)).tolist()))
+        raise ValueError(f"Unknown rollup {by!r}, expected year, decade, month, category or region")
+
+    def return_period(self, min_category=0, region=None, min_year=None, max_year=None):
+        """ Empirical annual rate and return period (years) of at least one landfall at or above a category. """
+        counts, _ = self._select(min_category, region, min_year, max_year)
+        annual = counts.sum(axis=(1, 2, 3))
+        years = len(annual)
+        years_with_landfall = int((annual > 0).sum())
+        return {
+            "years": years,
+            "years_with_landfall": years_with_landfall,
+            "landfalls": int(annual.sum()),
+            "annual_probability": years_with_landfall / years if years else None,
+            "return_period_years": years / years_with_landfall if years_with_landfall else None,
+        }
+
+    def trend(self, min_category=0, region=None, min_year=None, max_year=None):
+        """ Least-squares trend of the annual landfall counts, in landfalls per decade. """
+        counts, first_year = self._select(min_category, region, min_year, max_year)
+        annual = counts.sum(axis=(1, 2, 3)).astype(np.float64)
+        if len(annual) < 2:
+            return {"years": len(annual), "per_decade": None, "mean_per_year": None}
+        slope, _ = np.polyfit(first_year + np.arange(len(annual)), annual, 1)
+        return {"years": len(annual), "per_decade": float(slope * 10), "mean_per_year": float(annual.mean())}
+
+
+# Function to get the (first, last) seasons of a landfall set detected from a track store
+def store_season_span(store_dir, first_season=FIRST_LANDFALL_SEASON):
+    from trackStore import open_track_store
+    return first_season, int(open_track_store(store_dir).storms["year"].max())
+
+
+def build_cube(landfalls_csv=LANDFALLS_CSV_FILE, cube_path=CUBE_FILE, season_span=None):
+    """ Load the saved cube (if any), bring it up to date with the landfall set and save it.
+
+    season_span is the (first, last) season the landfall set was detected over, when it is known.
+    """
+    cube = ClimatologyCube.load(cube_path) if os.path.exists(cube_path) else ClimatologyCube.empty()
+    changed = cube.update(pd.read_csv(landfalls_csv, dtype=str))
+    span_changed = season_span is not None and tuple(season_span) != cube.season_span
+    if span_changed:
+        cube.season_span = tuple(season_span)
+    if changed or span_changed or not os.path.exists(cube_path):
+        cube.save(cube_path)
+    return cube, changed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the landfall climatology cube and query it.")
+    parser.add_argument("landfalls", nargs="?", default=LANDFALLS_CSV_FILE, help="Landfall CSV file")
+    parser.add_argument("--cube", default=CUBE_FILE, help="Cube file to update")
+    parser.add_argument("--by", default="decade", choices=["year", "decade", "month", "category", "region"])
+    parser.add_argument("--category", default="TS", choices=CATEGORIES, help="Minimum category")
+    parser.add_argument("--region", choices=REGIONS)
+    parser.add_argument("--seasons", type=int, nargs=2, metavar=("FIRST", "LAST"),
+                        help="Seasons the landfall set covers (default: the years with a landfall)")
+    args = parser.parse_args()
+
+    cube, changed = build_cube(args.landfalls, args.cube, args.seasons)
+    print(f"{len(changed)} seasons recounted, cube covers {cube.first_year}-{cube.years[-1] if len(cube.counts) else '-'}")
+
+    min_category = CATEGORIES.index(args.category)
+    for key, value in cube.rollup(args.by, min_category, args.region).items():
+        print(f"{key}: {value}")
+    print(cube.return_period(min_category, args.region))
+    print(cube.trend(min_category, args.region))
@@ -0,0 +1,228 @@
+import argparse
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage, finish_run
+from trackStore import STORMS_FILE, TRACKS_FILE, TRACK_STORE_DIR, open_track_store
+
+#-----------------------------------------------------------------------------------------------------------
+# County (or any admin polygon) exposure tables built on a precomputed spatial join.
+# The geometry work happens once per track store version and polygon layer:
+#   - every track point is assigned to the polygon that contains it (landfall points to the nearest polygon
+#     within a small tolerance, since the 'L' fixes sit on the coastline)
+#   - every track segment (two consecutive fixes of a storm) is assigned to every polygon it crosses
+# using a shapely STRtree. The assignment is cached on disk; the exposure tables are plain group-bys over
+# the assignment and the track columns, so aggregation queries never touch geometry again.
+#
+# Usage: python PythonScripts/countyExposure.py counties.shp --name-field NAME --by decade
+# -----------------------------------------------------------------------------------------------------------
+
+# The directory cached assignments are saved to
+EXPOSURE_CACHE_DIR = "exposure_cache"
+
+# Bump this whenever the assignment changes so older cached indexes are not reused
+EXPOSURE_INDEX_VERSION = 2
+
+# Distance in degrees within which a landfall fix just off the coastline is assigned to the nearest polygon
+LANDFALL_TOLERANCE = 0.05
+
+# Wind thresholds in knots
+TROPICAL_STORM_WIND = 34
+HURRICANE_WIND = 64
+
+
+# Function to hash files in chunks, used to key the cache by the track store and polygon layer contents
+def files_hash(paths, extra=""):
+    digest = hashlib.sha256(extra.encode())
+    for path in paths:
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+# Function to list the files of a polygon layer (a shapefile comes with its .dbf/.shx/.prj companions)
+def layer_files(path):
+    root, extension = os.path.splitext(path)
+    if extension.lower() != ".shp":
+        return [path]
+    companions = [root + suffix for suffix in (".shp", ".shx", ".dbf", ".prj")]
+    return [companion for companion in companions if os.path.exists(companion)]
+
+
+class ExposureIndex:
+    """ Precomputed point-to-polygon and segment-to-polygon assignment for one store and polygon layer. """
+
+    __slots__ = ("names", "point_polygon", "segment_rows", "segment_polygons")
+
+    def __init__(self, names, point_polygon, segment_rows, segment_polygons):
+        self.names = names
+        self.point_polygon = point_polygon
+        self.segment_rows = segment_rows
+        self.segment_polygons = segment_polygons
+
+    def save(self, path):
+        temp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temp_path, names=np.asarray(self.names, dtype=str), point_polygon=self.point_polygon,
+                 segment_rows=self.segment_rows, segment_polygons=self.segment_polygons)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["names"].tolist(), data["point_polygon"], data["segment_rows"], data["segment_polygons"])
+
+
+def build_exposure_index(store, polygons, names):
+    """ Assign every track point and segment of the store to the polygons, using one STRtree. """
+    import shapely
+
+    tree = shapely.STRtree(polygons)
+    latitudes = store.column("latitude").astype(np.float64)
+    longitudes = store.column("longitude").astype(np.float64)
+    valid = ~(np.isnan(latitudes) | np.isnan(longitudes))
+    points = shapely.points(longitudes, latitudes)
+
+    # Points: the containing polygon
+    point_polygon = np.full(len(points), -1, dtype=np.int32)
+    rows, matches = tree.query(points[valid], predicate="within")
+    point_polygon[np.flatnonzero(valid)[rows]] = matches
+
+    # Landfall fixes outside every polygon: the nearest one within the tolerance
+    landfall = valid & (store.column("indicator") == b"L") & (point_polygon < 0)
+    if landfall.any():
+        rows, matches = tree.query_nearest(points[landfall], max_distance=LANDFALL_TOLERANCE)
+        point_polygon[np.flatnonzero(landfall)[rows]] = matches
+
+    # Segments: every polygon crossed between two consecutive fixes of the same storm
+    row_storm = store.row_storm()
+    starts = np.flatnonzero((row_storm[:-1] == row_storm[1:]) & valid[:-1] & valid[1:])
+    lon1, lat1 = longitudes[starts], latitudes[starts]
+    lon2, lat2 = longitudes[starts + 1], latitudes[starts + 1]
+
+    # A segment across the antimeridian (e.g. 179.5E to 179.5W) would otherwise be drawn around the globe,
+    # it is split into two pieces that end on the +180 / -180 meridians at the crossing latitude
+    crossing = np.flatnonzero(np.abs(lon2 - lon1) > 180)
+    edge = np.where(lon1[crossing] >= 0, 180.0, -180.0)
+    fraction = (edge - lon1[crossing]) / (lon2[crossing] + 2 * edge - lon1[crossing])
+    lat_edge = lat1[crossing] + (lat2[crossing] - lat1[crossing]) * fraction
+    segment_rows = np.concatenate([starts, starts[crossing]])
+    lon1, lat1 = np.concatenate([lon1, -edge]), np.concatenate([lat1, lat_edge])
+    lon2, lat2 = np.concatenate([lon2, lon2[crossing]]), np.concatenate([lat2, lat2[crossing]])
+    lon2[crossing], lat2[crossing] = edge, lat_edge
+
+    lines = shapely.linestrings(
+        np.stack([np.stack([lon1, lat1], axis=-1), np.stack([lon2, lat2], axis=-1)], axis=1)
+    )
+    rows, matches = tree.query(lines, predicate="intersects")
+
+    # Both pieces of a split segment may cross the same polygon
+    pairs = np.unique(np.stack([segment_rows[rows], matches.astype(np.int64)], axis=1), axis=0)
+    return ExposureIndex(list(names), point_polygon, pairs[:, 0].astype(np.int64), pairs[:, 1].astype(np.int32))
+
+
+def load_exposure_index(store_dir, polygons_path, name_field, cache_dir=EXPOSURE_CACHE_DIR):
+    """ Exposure index for a store and polygon layer, from the cache when neither changed. """
+    key = files_hash([os.path.join(store_dir, TRACKS_FILE), os.path.join(store_dir, STORMS_FILE)]
+                     + layer_files(polygons_path), extra=f"{name_field}|{EXPOSURE_INDEX_VERSION}")
+    cache_path = os.path.join(cache_dir, f"exposure_{key}.npz")
+    if os.path.exists(cache_path):
+        return ExposureIndex.load(cache_path)
+
+    import geopandas as gpd
+
+    with stage("load_polygons"):
+        layer = gpd.read_file(polygons_path).to_crs("EPSG:4326")
+    with stage("spatial_join"):
+        index = build_exposure_index(open_track_store(store_dir), layer.geometry.values, layer[name_field].astype(str))
+    os.makedirs(cache_dir, exist_ok=True)
+    index.save(cache_path)
+    return index
+
+
+# Function to add the Year, Month and Decade columns derived from Date and keep the rows within the years
+def _with_periods(df, min_year, max_year):
+    df["Year"] = df["Date"] // 10000
+    df["Month"] = df["Date"] // 100 % 100
+    df["Decade"] = df["Year"] // 10 * 10
+    keep = np.ones(len(df), dtype=bool)
+    if min_year is not None:
+        keep &= (df["Year"] >= min_year).to_numpy()
+    if max_year is not None:
+        keep &= (df["Year"] <= max_year).to_numpy()
+    return df[keep]
+
+
+def exposure_table(index, store, by=None, min_year=None, max_year=None):
+    """ Landfalls, tropical-storm-force and hurricane-force passages and maximum wind per polygon.
+
+    by can be None (one row per polygon), "decade", "year" or "month". Counts are numbers of distinct storms.
+    """
+    row_storm = store.row_storm()
+    dates = store.column("date")
+    wind = store.column("max_wind").astype(np.float64)
+    wind[wind < 0] = np.nan
+
+    # Segment wind is the stronger of its two fixes
+    segments = pd.DataFrame({
+        "Polygon": index.segment_polygons,
+        "Storm": row_storm[index.segment_rows],
+        "Date": dates[index.segment_rows],
+        "Wind": np.fmax(wind[index.segment_rows], wind[index.segment_rows + 1]),
+    })
+    on_polygon = index.point_polygon >= 0
+    landfall = on_polygon & (store.column("indicator") == b"L")
+    landfalls = pd.DataFrame({
+        "Polygon": index.point_polygon[landfall],
+        "Storm": row_storm[landfall],
+        "Date": dates[landfall],
+    })
+
+    segments = _with_periods(segments, min_year, max_year)
+    landfalls = _with_periods(landfalls, min_year, max_year)
+
+    keys = ["Polygon"] + ([by.capitalize()] if by else [])
+    table = pd.concat([
+        landfalls.groupby(keys)["Storm"].nunique().rename("Landfalls"),
+        segments[segments["Wind"] >= TROPICAL_STORM_WIND].groupby(keys)["Storm"].nunique().rename("TS_Passages"),
+        segments[segments["Wind"] >= HURRICANE_WIND].groupby(keys)["Storm"].nunique().rename("HU_Passages"),
+        segments.groupby(keys)["Wind"].max().rename("Max_Wind"),
+    ], axis=1)
+
+    # Every polygon gets its rows, with zero counts where no storm touched it
+    polygons = pd.RangeIndex(len(index.names), name="Polygon")
+    if by:
+        periods = table.index.get_level_values(1).unique().sort_values()
+        table = table.reindex(pd.MultiIndex.from_product([polygons, periods], names=keys))
+    else:
+        table = table.reindex(polygons)
+    table[["Landfalls", "TS_Passages", "HU_Passages"]] = table[["Landfalls", "TS_Passages", "HU_Passages"]].fillna(0).astype(int)
+
+    table = table.reset_index()
+    table.insert(0, "Name", np.asarray(index.names, dtype=object)[table["Polygon"].to_numpy()])
+    return table.drop(columns="Polygon").sort_values(["Name"] + keys[1:]).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate hurricane exposure by county or other polygons.")
+    parser.add_argument("polygons", help="Local polygon layer (shapefile, GeoJSON, GeoPackage, ...)")
+    parser.add_argument("--name-field", default="NAME", help="Attribute holding the polygon names")
+    parser.add_argument("--store", default=TRACK_STORE_DIR, help="Track store directory")
+    parser.add_argument("--by", choices=["decade", "year", "month"], help="Also group by this period")
+    parser.add_argument("--min-year", type=int, default=1900)
+    parser.add_argument("--max-year", type=int)
+    parser.add_argument("--output", default="exposure_by_county.csv")
+    args = parser.parse_args()
+
+    with stage("load_index"):
+        index = load_exposure_index(args.store, args.polygons, args.name_field)
+    store = open_track_store(args.store)
+    with stage("aggregate", rows=len(index.segment_rows)):
+        table = exposure_table(index, store, args.by, args.min_year, args.max_year)
+
+    table.to_csv(args.output, index=False)
+    print(f"Exposure of {len(index.names)} polygons saved to {args.output}")
+    finish_run("countyExposure")
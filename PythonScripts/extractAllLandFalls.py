@@ -4,15 +4,22 @@
 
 import pandas as pd
 
+from instrumentation import stage, count, finish_run
+
 INPUT_CSV_FILE = "hurricane_data.csv"
 OUTPUT_LANDFALLS_CSV = "allLandfalls.csv"
 
-def filter_landfall_entries():
-    df = pd.read_csv(INPUT_CSV_FILE)
-    landfall_df = df[df["Indicator"] == "L"]
-    landfall_df.to_csv(OUTPUT_LANDFALLS_CSV, index=False)
+def filter_landfall_entries(input_csv=INPUT_CSV_FILE, output_csv=OUTPUT_LANDFALLS_CSV):
+    with stage("parse"):
+        df = pd.read_csv(input_csv)
+    with stage("detect", rows=len(df)):
+        landfall_df = df[df["Indicator"] == "L"]
+    count("landfalls", len(landfall_df))
+    with stage("export", rows=len(landfall_df)):
+        landfall_df.to_csv(output_csv, index=False)
 
-    print(f"Landfall data successfully saved to {OUTPUT_LANDFALLS_CSV}")
+    print(f"Landfall data successfully saved to {output_csv}")
 
 if __name__ == "__main__":
     filter_landfall_entries()
+    finish_run("extractAllLandFalls")
@@ -1,6 +1,10 @@
 import pandas as pd
-import geopandas as gpd
-from shapely.geometry import Point
+import sys
+
+from instrumentation import stage, count, profiled, finish_run
+import floridaGeometry
+
+# geopandas and shapely are imported on first use, so importing this module stays cheap
 
 # Path to the shapefile containing state boundaries
 # This shapefile is from Natural Earth (https://www.naturalearthdata.com/downloads/10m-cultural-vectors/10m-admin-1-states-provinces/)
@@ -8,10 +12,10 @@ from shapely.geometry import Point
 # It is important to ensure that the shapefile is in the same coordinate reference system (CRS) as the latitude and longitude data
 # This file helps in identifying whether a hurricane made landfall in Florida
 admin1_shapefile = "./ne_10m_admin_1_states_provinces.shp"
-states = gpd.read_file(admin1_shapefile)
 
-# Extract Florida's polygon from the shapefile
-florida_shape = states[states["name"] == "Florida"].geometry.iloc[0]
+# The parsed HURDAT2 data read by the script and the landfalls it writes
+INPUT_CSV_FILE = "PythonScripts/hurricane_data.csv"
+OUTPUT_CSV_FILE = "PythonScripts/florida_landfalls_using_L.csv"
 
 # Define the bounding box for Florida to filter out hurricanes that are not in Florida
 FLORIDA_LAT_MIN, FLORIDA_LAT_MAX = 24.5, 31.0
@@ -36,8 +40,11 @@ def is_inside_florida(latitude, longitude):
         return False
     
     # Create a point from the latitude and longitude
+    from shapely.geometry import Point
     point = Point(longitude, latitude)
-    if florida_shape.contains(point):
+
+    # Florida's polygon is extracted from the shapefile on first use
+    if floridaGeometry.florida_shape(admin1_shapefile).contains(point):
         return True
 
     # Check if the point is within the bounding box of Florida
@@ -48,29 +55,43 @@ def is_inside_florida(latitude, longitude):
 
 def extract_florida_landfalls(file_path: str):
     # Load the dataset
-    df = pd.read_csv(file_path)
+    with stage("parse"):
+        df = pd.read_csv(file_path)
+    count("rows_read", len(df))
 
-    # Extract 'Year' from 'Date' column
-    df["Year"] = df["Date"].astype(str).str[:4].astype(int)
+    with stage("decode", rows=len(df)):
+        # Extract 'Year' from 'Date' column
+        df["Year"] = df["Date"].astype(str).str[:4].astype(int)
 
-    # Convert Latitude and Longitude values
-    df["Latitude"] = df["Latitude"].apply(convert_lat_lon)
-    df["Longitude"] = df["Longitude"].apply(convert_lat_lon)
-    # Fix Longitude values > 180 beacause it is in the range of -180 to 180
-    df["Longitude"] = df["Longitude"].apply(lambda lon: lon - 360 if lon > 180 else lon)
+        # Convert Latitude and Longitude values
+        df["Latitude"] = df["Latitude"].apply(convert_lat_lon)
+        df["Longitude"] = df["Longitude"].apply(convert_lat_lon)
+        # Fix Longitude values > 180 beacause it is in the range of -180 to 180
+        df["Longitude"] = df["Longitude"].apply(lambda lon: lon - 360 if lon > 180 else lon)
 
-    # Filter only hurricanes with 'L' indicator (landfall)
-    df_landfalls = df[df["Indicator"] == "L"].copy()
+    with stage("detect", rows=len(df)):
+        # Filter only hurricanes with 'L' indicator (landfall)
+        df_landfalls = df[df["Indicator"] == "L"].copy()
 
-    # Filter only hurricanes from 1900 onwards
-    df_landfalls = df_landfalls[df_landfalls["Year"] >= 1900]
+        # Filter only hurricanes from 1900 onwards
+        df_landfalls = df_landfalls[df_landfalls["Year"] >= 1900]
 
     # Check if the hurricane made landfall in Florida
-    df_landfalls["In_Florida"] = df_landfalls.apply(lambda row: is_inside_florida(row["Latitude"], row["Longitude"]), axis=1)
+    with stage("classify", rows=len(df_landfalls)):
+        df_landfalls["In_Florida"] = df_landfalls.apply(lambda row: is_inside_florida(row["Latitude"], row["Longitude"]), axis=1)
 
     # Filter only hurricanes that made landfall in Florida
     df_florida_landfalls = df_landfalls[df_landfalls["In_Florida"] == True]
+    count("landfalls", len(df_florida_landfalls))
     return df_florida_landfalls
 
-df_florida_landfalls = extract_florida_landfalls("PythonScripts/hurricane_data.csv")
-df_florida_landfalls.to_csv("PythonScripts/florida_landfalls_using_L.csv", index=False)  # Save to CSV
\ No newline at end of file
+def main(input_csv=INPUT_CSV_FILE, output_csv=OUTPUT_CSV_FILE, profile=False):
+    with profiled(profile, "extractFloridaLandfallsUsingL"):
+        df_florida_landfalls = extract_florida_landfalls(input_csv)
+        with stage("export", rows=len(df_florida_landfalls)):
+            df_florida_landfalls.to_csv(output_csv, index=False)  # Save to CSV
+    finish_run("extractFloridaLandfallsUsingL")
+
+if __name__ == "__main__":
+    # Pass --profile to save a profile of the run in run_reports/
+    main(profile="--profile" in sys.argv)
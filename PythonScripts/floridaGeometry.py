@@ -0,0 +1,46 @@
+from functools import lru_cache
+
+from instrumentation import stage
+
+#-----------------------------------------------------------------------------------------------------------
+# Lazily loaded state boundaries.
+# geopandas and the 10m Natural Earth shapefile are only loaded the first time a shape is requested, so
+# importing the scripts that use them costs almost nothing. Every shape is loaded once per process.
+# -----------------------------------------------------------------------------------------------------------
+
+# Path to the shapefile containing state boundaries
+# This shapefile is from Natural Earth (https://www.naturalearthdata.com/downloads/10m-cultural-vectors/10m-admin-1-states-provinces/)
+ADMIN1_SHAPEFILE = "./ne_10m_admin_1_states_provinces.shp"
+
+# Buffer around the Florida boundary in degrees (0.05 degrees is roughly 3 miles)
+FLORIDA_BUFFER_DEGREES = 0.05
+
+
+@lru_cache(maxsize=None)
+def load_admin1_states(shapefile=ADMIN1_SHAPEFILE):
+    """ GeoDataFrame of the admin-1 boundaries, read on first use. """
+    import geopandas as gpd
+
+    with stage("load_shapefile"):
+        return gpd.read_file(shapefile)
+
+
+@lru_cache(maxsize=None)
+def state_shape(name, shapefile=ADMIN1_SHAPEFILE):
+    """ Polygon of one state or province of the admin-1 shapefile. """
+    states = load_admin1_states(shapefile)
+    return states[states["name"] == name].geometry.iloc[0]
+
+
+def florida_shape(shapefile=ADMIN1_SHAPEFILE):
+    return state_shape("Florida", shapefile)
+
+
+@lru_cache(maxsize=None)
+def florida_buffer(shapefile=ADMIN1_SHAPEFILE):
+    return florida_shape(shapefile).buffer(FLORIDA_BUFFER_DEGREES)
+
+
+@lru_cache(maxsize=None)
+def florida_border(shapefile=ADMIN1_SHAPEFILE):
+    return florida_shape(shapefile).boundary
@@ -0,0 +1,256 @@
+import argparse
+import string
+
+import numpy as np
+
+#-----------------------------------------------------------------------------------------------------------
+# Synthetic HURDAT2 generator for load and scale testing, fully offline and reproducible from a seed.
+# The output has the same layout as the real file (a header line per storm followed by its fixes), with:
+#   - storm counts per season and track lengths drawn around the real Atlantic averages
+#   - 6-hourly fixes, genesis in the tropics and westward motion that recurves to the northeast
+#   - a chosen share of storms steered through a Florida coastline point, with an 'L' fix there
+#   - wind, pressure, status and (from 2004) wind radii consistent with each other
+#   - optionally a share of malformed lines, to exercise the validating parser
+# Larger datasets are made of ensemble members: every member is a full realization of the seasons and is
+# told apart by its basin code (AL, then XA, XB, ...), so storm ids stay unique and 8 characters long.
+#
+# Usage: python PythonScripts/generateSyntheticHurdat2.py synthetic.txt --members 10 --seed 1
+# -----------------------------------------------------------------------------------------------------------
+
+OUTPUT_FILE = "synthetic_hurdat2.txt"
+
+FIRST_YEAR = 1851
+LAST_YEAR = 2023
+
+# Real Atlantic averages: about 11 storms per season and 28 fixes per storm
+STORMS_PER_YEAR = 11
+MEAN_FIXES = 28
+MIN_FIXES = 3
+
+# Share of storms steered through Florida (roughly the share of Atlantic storms with a Florida landfall)
+FLORIDA_CROSSING_RATE = 0.12
+
+# Points on the Florida coastline the crossing storms make landfall at (latitude, longitude)
+FLORIDA_COAST = np.array([
+    (30.35, -87.20), (30.15, -85.70), (29.70, -85.00), (29.10, -83.00), (27.80, -82.75),
+    (26.50, -82.00), (26.10, -81.80), (25.80, -81.40), (24.70, -81.00), (25.80, -80.15),
+    (26.70, -80.05), (27.60, -80.35), (28.10, -80.60), (29.20, -81.00), (30.30, -81.40),
+])
+
+# Pressure is mostly missing before this year and the wind radii before the next
+FIRST_PRESSURE_YEAR = 1979
+FIRST_RADII_YEAR = 2004
+
+MISSING = -999
+
+# Layout of a data line: date, time, indicator, status, latitude, longitude, wind, pressure, 12 radii, RMW
+LINE_FORMAT = "{:08d}, {:04d}, {:>1}, {:>2}, {:4.1f}{}, {:5.1f}{}, {:3d}, {:4d}," + " {:4d}," * 13
+
+# Basin codes of the ensemble members
+BASIN_CODES = ["AL"] + [first + second for first in "XYZQRSTUVW" for second in string.ascii_uppercase]
+
+STORM_NAMES = [
+    "ALPHA", "BRAVO", "CHARLIE", "DELTA", "ECHO", "FOXTROT", "GOLF", "HOTEL", "INDIA", "JULIET", "KILO",
+    "LIMA", "MIKE", "NOVEMBER", "OSCAR", "PAPA", "QUEBEC", "ROMEO", "SIERRA", "TANGO", "UNIFORM", "VICTOR",
+    "WHISKEY", "XRAY", "YANKEE", "ZULU",
+]
+
+
+# Function to draw the storms of every season: year, number within the season and genesis time
+def draw_storms(rng, first_year, last_year, storms_per_year):
+    years = np.arange(first_year, last_year + 1)
+    per_season = np.minimum(rng.poisson(storms_per_year, size=len(years)), 99)
+    year = np.repeat(years, per_season)
+
+    # Genesis between June and November, on a synoptic hour
+    day = np.clip(rng.normal(245, 30, size=len(year)), 152, 330).astype(np.int64)
+    genesis = (
+        (year - 1970).astype("datetime64[Y]").astype("datetime64[D]") + day
+    ).astype("datetime64[m]") + rng.integers(0, 4, size=len(year)) * 360
+
+    # Storms are numbered in order of genesis within their season
+    order = np.lexsort((genesis, year))
+    year, genesis = year[order], genesis[order]
+    first = np.cumsum(per_season) - per_season
+    number = np.arange(len(year)) - np.repeat(first, per_season) + 1
+    return year, number, genesis
+
+
+# Function to build the tracks of all storms in one vectorized pass, returns flat per-fix columns
+def draw_tracks(rng, year, genesis, crossing_rate):
+    n = len(year)
+    counts = np.maximum(rng.gamma(2.5, MEAN_FIXES / 2.5, size=n).astype(np.int64), MIN_FIXES)
+    storm = np.repeat(np.arange(n), counts)
+    starts = np.cumsum(counts) - counts
+    k = np.arange(counts.sum()) - starts[storm]
+
+    # Motion per 6 hours: west-northwest at first, turning north-east after the recurvature step
+    recurve = rng.uniform(0.3, 1.0, size=n) * counts
+    turn = 1.0 / (1.0 + np.exp(-(k - recurve[storm]) / 3.0))
+    dlat = 0.25 + 0.45 * turn + rng.normal(0, 0.15, size=len(k))
+    dlon = -1.0 + 2.0 * turn + rng.normal(0, 0.2, size=len(k))
+    dlat[starts] = 0.0
+    dlon[starts] = 0.0
+    latitude = np.cumsum(dlat)
+    longitude = np.cumsum(dlon)
+    latitude -= np.repeat(latitude[starts], counts)
+    longitude -= np.repeat(longitude[starts], counts)
+    latitude += np.repeat(rng.uniform(10, 25, size=n), counts)
+    longitude += np.repeat(rng.uniform(-80, -25, size=n), counts)
+
+    # Crossing storms are shifted so one of their fixes sits on the coastline, that fix gets the 'L'
+    crossing = rng.random(n) < crossing_rate
+    landfall = starts + (rng.uniform(0.3, 0.7, size=n) * (counts - 1)).astype(np.int64)
+    coast = FLORIDA_COAST[rng.integers(0, len(FLORIDA_COAST), size=n)]
+    shift_lat = np.where(crossing, coast[:, 0] - latitude[landfall], 0.0)
+    shift_lon = np.where(crossing, coast[:, 1] - longitude[landfall], 0.0)
+    latitude += np.repeat(shift_lat, counts)
+    longitude += np.repeat(shift_lon, counts)
+    latitude = np.clip(latitude, 5.0, 65.0)
+    longitude = ((longitude + 180.0) % 360.0) - 180.0
+
+    # Intensity rises to a peak and decays, faster once a crossing storm is over land
+    peak = np.clip(rng.gamma(4.0, 18.0, size=n), 35, 160)
+    life = np.sin(np.pi * (k + 0.5) / counts[storm])
+    wind = 25 + (peak[storm] - 25) * life + rng.normal(0, 4, size=len(k))
+    after = crossing[storm] & (np.arange(len(k)) > landfall[storm])
+    wind = np.where(after, wind * np.exp(-0.2 * (np.arange(len(k)) - landfall[storm])), wind)
+    wind = np.clip(np.rint(wind / 5) * 5, 15, 165).astype(np.int64)
+
+    # The landfall fix is an extra-synoptic one, somewhere between two synoptic hours
+    minutes = genesis[storm] + k * 360
+    indicator = np.full(len(k), "", dtype="<U1")
+    landfall_rows = landfall[crossing]
+    indicator[landfall_rows] = "L"
+    minutes[landfall_rows] += rng.integers(1, 36, size=len(landfall_rows)) * 10
+
+    return storm, counts, minutes, indicator, latitude, longitude, wind, year[storm]
+
+
+# Function to derive the status, pressure and wind radii columns from the wind
+def derive_columns(rng, wind, years):
+    status = np.select([wind < 34, wind < 64], ["TD", "TS"], default="HU")
+    status = np.where(rng.random(len(wind)) < 0.03, "EX", status)
+
+    # Wind-pressure relation, rounded to whole millibars
+    pressure = np.rint(1010 - (wind / 6.7) ** (1 / 0.644)).astype(np.int64)
+    pressure = np.where((years < FIRST_PRESSURE_YEAR) & (rng.random(len(wind)) < 0.9), MISSING, pressure)
+
+    # Quadrant radii in nautical miles (NE, SE, SW, NW) for 34, 50 and 64 kt, larger on the east side
+    asymmetry = np.array([1.2, 1.1, 0.8, 0.9])
+    radii = []
+    for threshold, scale in ((34, 2.2), (50, 1.2), (64, 0.7)):
+        base = np.maximum(wind - threshold + 10, 0) * scale
+        values = np.rint(base[:, None] * asymmetry / 5) * 5
+        radii.append(np.where((wind >= threshold)[:, None], values, 0))
+    radii = np.concatenate(radii, axis=1).astype(np.int64)
+    radius_max_wind = np.clip(np.rint(60 - wind * 0.3), 10, 60).astype(np.int64)
+
+    no_radii = years < FIRST_RADII_YEAR
+    radii[no_radii] = MISSING
+    radius_max_wind[no_radii] = MISSING
+    return status, pressure, radii, radius_max_wind
+
+
+# Function to split dates in minutes since 1970 into HURDAT2 date (YYYYMMDD) and time (HHMM) integers
+def date_and_time(minutes):
+    days = minutes.astype("datetime64[D]")
+    months = days.astype("datetime64[M]")
+    dates = (
+        (months.astype("datetime64[Y]").astype(np.int64) + 1970) * 10000
+        + (months.astype(np.int64) % 12 + 1) * 100 + (days - months).astype(np.int64) + 1
+    )
+    clock = (minutes - days.astype("datetime64[m]")).astype(np.int64)
+    return dates, clock // 60 * 100 + clock % 60
+
+
+# Function to replace a share of the data lines with the kinds of damage the validating parser reports
+def corrupt_lines(rng, lines, rate):
+    damaged = np.flatnonzero(rng.random(len(lines)) < rate)
+    kinds = rng.integers(0, 5, size=len(damaged))
+    for row, kind in zip(damaged.tolist(), kinds.tolist()):
+        parts = lines[row].split(",")
+        if kind == 0:
+            lines[row] = ",".join(parts[:8]) + ","            # missing wind radii
+        elif kind == 1:
+            parts[4] = " 95.0N"                               # latitude out of range
+            lines[row] = ",".join(parts)
+        elif kind == 2:
+            parts[3] = " ZZ"                                  # unknown status
+            lines[row] = ",".join(parts)
+        elif kind == 3:
+            parts[6] = " -40"                                 # negative wind
+            lines[row] = ",".join(parts)
+        else:
+            lines[row] = "garbage line"                       # stray line, also breaks the header count
+    return len(damaged)
+
+
+# Function to generate one ensemble member and return its storm header and data lines
+def generate_member(rng, basin, first_year, last_year, storms_per_year, crossing_rate):
+    year, number, genesis = draw_storms(rng, first_year, last_year, storms_per_year)
+    storm, counts, minutes, indicator, latitude, longitude, wind, years = draw_tracks(rng, year, genesis, crossing_rate)
+    status, pressure, radii, radius_max_wind = derive_columns(rng, wind, years)
+    dates, times = date_and_time(minutes)
+
+    # One format call per line over plain Python lists
+    columns = [
+        dates, times, indicator, status,
+        np.abs(latitude), np.where(latitude >= 0, "N", "S"), np.abs(longitude), np.where(longitude >= 0, "E", "W"),
+        wind, pressure, *radii.T, radius_max_wind,
+    ]
+    lines = [LINE_FORMAT.format(*row) for row in zip(*(column.tolist() for column in columns))]
+
+    # Headers: id, name (UNNAMED before 1950) and the number of fixes
+    headers = [
+        f"{basin}{n:02d}{y},{STORM_NAMES[(n - 1) % len(STORM_NAMES)] if y >= 1950 else 'UNNAMED':>19},{count:>7},"
+        for n, y, count in zip(number.tolist(), year.tolist(), counts.tolist())
+    ]
+    return headers, counts, lines
+
+
+def generate_hurdat2(output_file=OUTPUT_FILE, seed=0, members=1, first_year=FIRST_YEAR, last_year=LAST_YEAR,
+                     storms_per_year=STORMS_PER_YEAR, crossing_rate=FLORIDA_CROSSING_RATE, malformed_rate=0.0):
+    """ Write a synthetic HURDAT2 file and return (storms, data lines, malformed lines).
+
+    Every member has its own random stream derived from the seed, so a member is the same whatever the
+    number of members, and members are written one at a time to keep memory flat.
+    """
+    if not 1 <= members <= len(BASIN_CODES):
+        raise ValueError(f"members must be between 1 and {len(BASIN_CODES)}")
+
+    storms = rows = malformed = 0
+    with open(output_file, "w") as file:
+        for member in range(members):
+            rng = np.random.default_rng([seed, member])
+            headers, counts, lines = generate_member(rng, BASIN_CODES[member], first_year, last_year,
+                                                     storms_per_year, crossing_rate)
+            if malformed_rate > 0:
+                malformed += corrupt_lines(rng, lines, malformed_rate)
+
+            starts = (np.cumsum(counts) - counts).tolist()
+            for header, start, count in zip(headers, starts, counts.tolist()):
+                file.write(header + "\n")
+                file.write("\n".join(lines[start:start + count]) + "\n")
+            storms += len(headers)
+            rows += len(lines)
+
+    return storms, rows, malformed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic HURDAT2 file for load and scale testing.")
+    parser.add_argument("output", nargs="?", default=OUTPUT_FILE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--members", type=int, default=1, help="Ensemble members, each a full set of seasons")
+    parser.add_argument("--first-year", type=int, default=FIRST_YEAR)
+    parser.add_argument("--last-year", type=int, default=LAST_YEAR)
+    parser.add_argument("--storms-per-year", type=float, default=STORMS_PER_YEAR)
+    parser.add_argument("--florida-rate", type=float, default=FLORIDA_CROSSING_RATE,
+                        help="Share of storms steered through Florida")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of data lines to damage")
+    args = parser.parse_args()
+
+    storms, rows, malformed = generate_hurdat2(args.output, args.seed, args.members, args.first_year, args.last_year,
+                                               args.storms_per_year, args.florida_rate, args.malformed_rate)
+    print(f"{storms} storms, {rows} track rows ({malformed} malformed) written to {args.output}")
@@ -0,0 +1,316 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from floridaGeometry import ADMIN1_SHAPEFILE
+from ingestHurricaneData import expand_inputs
+from trackStore import STORMS_FILE, TRACKS_FILE, TRACK_STORE_DIR
+
+#-----------------------------------------------------------------------------------------------------------
+# Single entry point for the whole pipeline, run from the repository root:
+#   python PythonScripts/hurricanePipeline.py ingest  --hurdat2 Hurricanes.txt
+#   python PythonScripts/hurricanePipeline.py detect
+#   python PythonScripts/hurricanePipeline.py train
+#   python PythonScripts/hurricanePipeline.py export
+#   python PythonScripts/hurricanePipeline.py serve
+# Stages form a DAG: a stage depends on whichever stage writes one of its inputs. Every stage has a
+# fingerprint made of the content hashes of its inputs, its code and its parameters; a stage only runs when
+# the fingerprint changed or one of its outputs is missing or was modified. Stages whose dependencies are
+# done run in parallel in a process pool.
+# -----------------------------------------------------------------------------------------------------------
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fingerprints and output hashes of the last successful run of every stage
+STATE_FILE = "PythonScripts/.pipeline_state.json"
+
+# Default inputs and artifacts, all relative to the repository root
+HURDAT2_FILE = "Hurricanes.txt"
+HURRICANE_DATA_CSV = "PythonScripts/hurricane_data.csv"
+INGEST_ERRORS_CSV = "PythonScripts/hurricane_data_errors.csv"
+ALL_LANDFALLS_CSV = "allLandfalls.csv"
+LANDFALLS_USING_L_CSV = "PythonScripts/florida_landfalls_using_L.csv"
+LANDFALLS_WITHOUT_L_CSV = "PythonScripts/florida_landfalls_without_using_L.csv"
+PREDICTIONS_CSV = "PythonScripts/florida_hurricane_predictions_60_40.csv"
+CLIMATOLOGY_CUBE = "PythonScripts/climatology_cube.npz"
+RECONCILIATION_CSV = "PythonScripts/landfall_reconciliation.csv"
+DISAGREEMENTS_CSV = "PythonScripts/landfall_disagreements.csv"
+ANALOG_INDEX = "PythonScripts/analog_index.npz"
+PUBLIC_DIR = "public"
+
+# The admin-1 shapefile the Florida geometry is read from, with the companion files read along with it
+ADMIN1_FILES = [os.path.splitext(ADMIN1_SHAPEFILE)[0] + extension for extension in (".shp", ".shx", ".dbf", ".prj")]
+
+
+class Stage:
+    """ One step of the pipeline: a function from input files to output files. """
+
+    def __init__(self, name, func, inputs, outputs, code, params=None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.code = list(code)
+        self.params = params or {}
+
+
+# Stage functions run in worker processes, so they are top-level and import their script on first use
+
+def run_stage(func, inputs, outputs, params):
+    """ Run one stage function in a worker, with a fresh run report so stages of earlier tasks do not leak in. """
+    from instrumentation import current_report
+    current_report.reset()
+    return func(inputs, outputs, params)
+
+
+def run_ingest(inputs, outputs, params):
+    from ingestHurricaneData import ingest_files
+    from trackStore import write_track_store
+
+    df, errors = ingest_files(inputs, validate=True)
+    df.drop(columns="Line").to_csv(outputs[0], index=False)
+    write_track_store(df, params["store_dir"])
+    errors.to_csv(outputs[1], index=False)
+
+
+def run_all_landfalls(inputs, outputs, params):
+    from extractAllLandFalls import filter_landfall_entries
+    filter_landfall_entries(inputs[0], outputs[0])
+
+
+def run_landfalls_using_l(inputs, outputs, params):
+    import extractFloridaLandfallsUsingL
+    extractFloridaLandfallsUsingL.main(inputs[0], outputs[0])
+
+
+def run_landfalls_without_l(inputs, outputs, params):
+    import extractFloridaLandFallsWithoutL
+    extractFloridaLandFallsWithoutL.main(inputs[0], outputs[0])
+
+
+def run_train(inputs, outputs, params):
+    from machineLearningApproach import train_landfall_model
+    train_landfall_model(inputs[0], outputs[0], test_size=params["test_size"])
+
+
+def run_climatology(inputs, outputs, params):
+    from climatologyStats import build_cube, store_season_span
+    build_cube(inputs[0], outputs[0], store_season_span(params["store_dir"]))
+
+
+def run_analogs(inputs, outputs, params):
+    from stormAnalogs import build_analog_index
+    build_analog_index(params["store_dir"], outputs[0])
+
+
+def run_reconcile(inputs, outputs, params):
+    from reconcileLandfalls import reconcile, save_report
+    events, _ = reconcile(inputs[0], predictions_csv=inputs[1])
+    save_report(events, outputs[0], outputs[1])
+
+
+def run_export(inputs, outputs, params):
+    # The frontend reads the landfall CSVs from public/
+    for source, destination in zip(inputs, outputs):
+        shutil.copyfile(source, destination)
+
+
+def build_stages(hurdat2_files, store_dir=TRACK_STORE_DIR, test_size=0.6):
+    stages = [
+        Stage("ingest", run_ingest, hurdat2_files,
+              [HURRICANE_DATA_CSV, INGEST_ERRORS_CSV,
+               os.path.join(store_dir, TRACKS_FILE), os.path.join(store_dir, STORMS_FILE)],
+              ["ingestHurricaneData.py", "parseHurricaneData.py", "trackStore.py"], {"store_dir": store_dir}),
+        Stage("all_landfalls", run_all_landfalls, [HURRICANE_DATA_CSV], [ALL_LANDFALLS_CSV],
+              ["extractAllLandFalls.py"]),
+        Stage("landfalls_using_l", run_landfalls_using_l, [HURRICANE_DATA_CSV] + ADMIN1_FILES, [LANDFALLS_USING_L_CSV],
+              ["extractFloridaLandfallsUsingL.py", "floridaGeometry.py"]),
+        Stage("landfalls_without_l", run_landfalls_without_l, [HURRICANE_DATA_CSV] + ADMIN1_FILES,
+              [LANDFALLS_WITHOUT_L_CSV], ["extractFloridaLandFallsWithoutL.py", "floridaGeometry.py"]),
+        Stage("train", run_train, [HURRICANE_DATA_CSV] + ADMIN1_FILES, [PREDICTIONS_CSV],
+              ["machineLearningApproach.py", "floridaGeometry.py"], {"test_size": test_size}),
+        Stage("climatology", run_climatology,
+              [LANDFALLS_USING_L_CSV, os.path.join(store_dir, TRACKS_FILE), os.path.join(store_dir, STORMS_FILE)],
+              [CLIMATOLOGY_CUBE], ["climatologyStats.py", "trackStore.py"], {"store_dir": store_dir}),
+        Stage("analogs", run_analogs,
+              [os.path.join(store_dir, TRACKS_FILE), os.path.join(store_dir, STORMS_FILE)], [ANALOG_INDEX],
+              ["stormAnalogs.py", "resampleTracks.py", "trackStore.py"], {"store_dir": store_dir}),
+        Stage("reconcile", run_reconcile, [HURRICANE_DATA_CSV, PREDICTIONS_CSV] + ADMIN1_FILES,
+              [RECONCILIATION_CSV, DISAGREEMENTS_CSV], ["reconcileLandfalls.py", "floridaGeometry.py"]),
+        Stage("export", run_export, [LANDFALLS_USING_L_CSV, LANDFALLS_WITHOUT_L_CSV],
+              [os.path.join(PUBLIC_DIR, os.path.basename(LANDFALLS_USING_L_CSV)),
+               os.path.join(PUBLIC_DIR, os.path.basename(LANDFALLS_WITHOUT_L_CSV))],
+              []),
+    ]
+    return {stage.name: stage for stage in stages}
+
+
+# Subcommands and the stages they bring up to date (dependencies are added automatically)
+COMMAND_TARGETS = {
+    "ingest": ["ingest"],
+    "detect": ["all_landfalls", "landfalls_using_l", "landfalls_without_l", "climatology"],
+    "train": ["train"],
+    "reconcile": ["reconcile"],
+    "analogs": ["analogs"],
+    "export": ["export"],
+    "all": ["all_landfalls", "climatology", "train", "analogs", "export"],
+    "serve": ["ingest", "analogs"],
+}
+
+
+# Function to compute the SHA-256 of a file in chunks, so large inputs are never read into memory at once
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dependencies(stages):
+    """ Map every stage to the stages that write one of its inputs. """
+    producers = {output: stage.name for stage in stages.values() for output in stage.outputs}
+    return {
+        stage.name: {producers[path] for path in stage.inputs if path in producers and producers[path] != stage.name}
+        for stage in stages.values()
+    }
+
+
+def fingerprint(stage):
+    digest = hashlib.sha256(stage.name.encode())
+    digest.update(json.dumps(stage.params, sort_keys=True).encode())
+    for path in stage.inputs:
+        digest.update(path.encode())
+        digest.update(file_hash(path).encode())
+    for script in stage.code:
+        digest.update(file_hash(os.path.join(SCRIPTS_DIR, script)).encode())
+    return digest.hexdigest()
+
+
+def is_up_to_date(stage, stage_fingerprint, state):
+    previous = state.get(stage.name)
+    if previous is None or previous["fingerprint"] != stage_fingerprint:
+        return False
+    return all(
+        os.path.exists(path) and file_hash(path) == previous["outputs"].get(path)
+        for path in stage.outputs
+    )
+
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {}
+    with open(STATE_FILE) as file:
+        return json.load(file)
+
+
+def save_state(state):
+    temp_path = STATE_FILE + ".tmp"
+    with open(temp_path, "w") as file:
+        json.dump(state, file, indent=2, sort_keys=True)
+    os.replace(temp_path, STATE_FILE)
+
+
+def run_pipeline(stages, targets, jobs=None, force=False, dry_run=False):
+    """ Bring the target stages up to date, running independent stages in parallel. Returns the stages run. """
+    depends_on = dependencies(stages)
+
+    # Everything the targets need, transitively
+    needed = set()
+    queue = list(targets)
+    while queue:
+        name = queue.pop()
+        if name not in needed:
+            needed.add(name)
+            queue.extend(depends_on[name])
+
+    state = load_state()
+    pending = set(needed)
+    done = set()
+    executed = []
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            # Start (or skip) every stage whose dependencies have finished
+            ready = sorted(name for name in pending if depends_on[name] <= done)
+            for name in ready:
+                pending.remove(name)
+                stage = stages[name]
+                ran_upstream = any(dependency in executed for dependency in depends_on[name])
+                if dry_run:
+                    stage_fingerprint = None if ran_upstream else fingerprint(stage)
+                    if not force and not ran_upstream and is_up_to_date(stage, stage_fingerprint, state):
+                        print(f"[skip] {name}")
+                    else:
+                        print(f"[would run] {name}")
+                        executed.append(name)
+                    done.add(name)
+                    continue
+
+                stage_fingerprint = fingerprint(stage)
+                if not force and is_up_to_date(stage, stage_fingerprint, state):
+                    print(f"[skip] {name} (up to date)")
+                    done.add(name)
+                    continue
+
+                print(f"[run] {name}")
+                future = pool.submit(run_stage, stage.func, stage.inputs, stage.outputs, stage.params)
+                running[future] = (name, stage_fingerprint)
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, stage_fingerprint = running.pop(future)
+                try:
+                    future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    print(f"[failed] {name}", file=sys.stderr)
+                    raise
+                state[name] = {
+                    "fingerprint": stage_fingerprint,
+                    "outputs": {path: file_hash(path) for path in stages[name].outputs},
+                }
+                save_state(state)
+                executed.append(name)
+                done.add(name)
+                print(f"[done] {name}")
+
+    return executed
+
+
+def serve(store_dir, host, port):
+    import uvicorn
+
+    # backend.py reads the store location from the environment, so it serves what ingest just built
+    os.environ["TRACK_STORE_DIR"] = os.path.abspath(store_dir)
+    backend_dir = os.path.join(SCRIPTS_DIR, "..", "Old backend files")
+    uvicorn.run("backend:app", app_dir=backend_dir, host=host, port=port, timeout_keep_alive=120)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the hurricane tracker pipeline.")
+    parser.add_argument("command", choices=sorted(COMMAND_TARGETS))
+    parser.add_argument("--hurdat2", nargs="+", default=[HURDAT2_FILE], help="HURDAT2 files or glob patterns")
+    parser.add_argument("--store", default=TRACK_STORE_DIR, help="Track store directory")
+    parser.add_argument("--test-size", type=float, default=0.6, help="Share of rows held out by the train stage")
+    parser.add_argument("--jobs", type=int, help="Number of stages run in parallel (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Run the stages even if they are up to date")
+    parser.add_argument("--dry-run", action="store_true", help="Only print which stages would run")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    stages = build_stages(expand_inputs(args.hurdat2), args.store, args.test_size)
+    run_pipeline(stages, COMMAND_TARGETS[args.command], args.jobs, args.force, args.dry_run)
+
+    if args.command == "serve" and not args.dry_run:
+        serve(args.store, args.host, args.port)
@@ -0,0 +1,94 @@
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from parseHurricaneData import HURDAT2_FILE, parse_hurdat2_columns
+from trackStore import TRACK_STORE_DIR, write_track_store
+
+#-----------------------------------------------------------------------------------------------------------
+# This script ingests one or more HURDAT2 files (Atlantic, Northeast/North-Central Pacific, reanalysis
+# variants, ...) into a single track store.
+# Every file is parsed in its own process, so ingesting N files takes about as long as the largest one.
+# Each row is tagged with the file it came from ("Source") and the basin of its storm ("Basin_Code").
+#
+# Usage: python ingestHurricaneData.py hurdat2-atl.txt "hurdat2-nepac*.txt" --store track_store --validate
+# -----------------------------------------------------------------------------------------------------------
+
+# The file the merged error report is written to when --validate is given
+INGEST_ERRORS_CSV_FILE = "ingest_errors.csv"
+
+
+# Function to expand the file arguments and globs into a list of existing files, in argument order
+def expand_inputs(patterns):
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        for path in matches:
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"No HURDAT2 file matches {pattern}")
+            if path not in files:
+                files.append(path)
+    return files
+
+
+# Function to parse a single file in a worker process and tag its rows with their source and basin
+def parse_source(path, validate=False):
+    source = os.path.basename(path)
+    df, errors = parse_hurdat2_columns(path, validate=validate)
+    df["Source"] = source
+    df["Basin_Code"] = df["Basin"].str[:2]
+    if errors is not None:
+        errors.insert(0, "Source", source)
+    return df, errors
+
+
+def ingest_files(paths, validate=False, workers=None):
+    """ Parse several HURDAT2 files concurrently and return the merged (DataFrame, error report).
+
+    The rows are merged in the order of paths, so the first file given wins when storms repeat (TrackStore.find).
+    """
+    workers = workers or min(len(paths), os.cpu_count() or 1)
+    if workers == 1 or len(paths) == 1:
+        results = [parse_source(path, validate) for path in paths]
+    else:
+        # Starting the largest files first keeps the slowest parse from being queued behind the small ones
+        order = sorted(range(len(paths)), key=lambda i: os.path.getsize(paths[i]), reverse=True)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(parse_source, [paths[i] for i in order], [validate] * len(paths)))
+        results = [None] * len(paths)
+        for i, result in zip(order, parsed):
+            results[i] = result
+
+    # Keep the line number of every row next to its source, the index alone is only unique per file
+    df = pd.concat([frame for frame, _ in results]).reset_index()
+    errors = None
+    if validate:
+        errors = pd.concat([report for _, report in results], ignore_index=True)
+    return df, errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest HURDAT2 files into a single track store.")
+    parser.add_argument("inputs", nargs="*", default=[HURDAT2_FILE], help="HURDAT2 files or glob patterns")
+    parser.add_argument("--store", default=TRACK_STORE_DIR, help="Track store directory to write")
+    parser.add_argument("--csv", help="Also save the merged rows to this CSV file")
+    parser.add_argument("--validate", action="store_true", help="Check every row and save an error report")
+    parser.add_argument("--workers", type=int, help="Number of parser processes (default: one per file)")
+    args = parser.parse_args()
+
+    paths = expand_inputs(args.inputs)
+    df, errors = ingest_files(paths, validate=args.validate, workers=args.workers)
+
+    meta = write_track_store(df, args.store)
+    print(f"Ingested {meta['rows']} rows of {meta['storms']} storms from {len(paths)} files into {args.store}")
+    for (source, basin), count in df.groupby(["Source", "Basin_Code"]).size().items():
+        print(f"  {source}: {count} rows in basin {basin}")
+
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+    if errors is not None:
+        errors.to_csv(INGEST_ERRORS_CSV_FILE, index=False)
+        print(f"{len(errors)} problems saved to {INGEST_ERRORS_CSV_FILE}")
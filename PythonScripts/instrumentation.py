@@ -0,0 +1,233 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, peak memory is reported as None there
+    resource = None
+
+#-----------------------------------------------------------------------------------------------------------
+# Lightweight instrumentation for the extractors and the API.
+#   stage("classify", rows=len(df))  - times a block, counts its rows and samples the peak memory after it
+#   count("landfalls", n)            - adds to a named counter
+#   profiled("--profile" in argv)    - optionally runs a block under pyinstrument (if installed) or cProfile
+#   finish_run("name")               - prints the stage table, saves a JSON run report and starts a new one
+#   RequestMetrics                   - per-request timings for the FastAPI app in Prometheus text format
+# Everything is recorded in-process and costs a couple of clock reads per stage.
+# -----------------------------------------------------------------------------------------------------------
+
+# The directory the JSON run reports and profiles are saved to
+RUN_REPORT_DIR = "run_reports"
+
+# Upper bounds (seconds) of the request duration histogram buckets
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Function to read the peak resident memory of the process in megabytes
+def peak_memory_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class RunReport:
+    """ Stage timings, row counts, counters and memory samples collected during one run. """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """ Start a new run, in place so modules holding a reference to the report keep recording into it. """
+        with self._lock:
+            self.started = time.time()
+            self.stages = []
+            self.counters = {}
+
+    def add_stage(self, name, seconds, rows):
+        with self._lock:
+            self.stages.append({
+                "stage": name,
+                "seconds": round(seconds, 4),
+                "rows": rows,
+                "peak_memory_mb": peak_memory_mb(),
+            })
+
+    def add_count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def to_dict(self):
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started)),
+            "total_seconds": round(time.time() - self.started, 4),
+            "peak_memory_mb": peak_memory_mb(),
+            "stages": list(self.stages),
+            "counters": dict(self.counters),
+        }
+
+    def summary(self):
+        lines = [f"{'stage':<20}{'seconds':>10}{'rows':>10}{'peak MB':>10}"]
+        for entry in self.stages:
+            rows = "" if entry["rows"] is None else entry["rows"]
+            memory = "" if entry["peak_memory_mb"] is None else entry["peak_memory_mb"]
+            lines.append(f"{entry['stage']:<20}{entry['seconds']:>10.3f}{rows:>10}{memory:>10}")
+        for name, value in self.counters.items():
+            lines.append(f"{name:<20}{value:>20}")
+        return "\n".join(lines)
+
+
+# The report of the current process, shared by every module that records stages
+current_report = RunReport()
+
+
+@contextmanager
+def stage(name, rows=None):
+    """ Time a block and record it as a stage of the current run. """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current_report.add_stage(name, time.perf_counter() - start, rows)
+
+
+def count(name, n=1):
+    current_report.add_count(name, n)
+
+
+@contextmanager
+def profiled(enabled, name="run"):
+    """ Profile a block when enabled, saving the output to RUN_REPORT_DIR. """
+    if not enabled:
+        yield
+        return
+
+    os.makedirs(RUN_REPORT_DIR, exist_ok=True)
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        Profiler = None
+
+    if Profiler is not None:
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            output_path = os.path.join(RUN_REPORT_DIR, f"{name}.html")
+            with open(output_path, "w") as file:
+                file.write(profiler.output_html())
+            print(profiler.output_text(unicode=False, color=False))
+            print(f"Profile saved to {output_path}")
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        output_path = os.path.join(RUN_REPORT_DIR, f"{name}.prof")
+        profiler.dump_stats(output_path)
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(25)
+        print(text.getvalue())
+        print(f"Profile saved to {output_path} (open it with snakeviz or pstats)")
+
+
+def finish_run(name):
+    """ Print the stage table of the current run and save it as a JSON run report. """
+    os.makedirs(RUN_REPORT_DIR, exist_ok=True)
+    output_path = os.path.join(RUN_REPORT_DIR, f"{name}.json")
+    report = current_report.to_dict()
+    report["name"] = name
+    with open(output_path, "w") as file:
+        json.dump(report, file, indent=2)
+    print(current_report.summary())
+    print(f"Run report saved to {output_path}")
+
+    # The next run in this process (e.g. another pipeline stage in the same worker) starts from scratch
+    current_report.reset()
+    return report
+
+
+class RequestMetrics:
+    """ Per-route request counts and duration histograms, rendered in the Prometheus text format. """
+
+    def __init__(self, buckets=REQUEST_BUCKETS):
+        self.buckets = buckets
+        self.requests = {}
+        self.durations = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method, path, status, seconds):
+        with self._lock:
+            key = (method, path, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            histogram = self.durations.get((method, path))
+            if histogram is None:
+                histogram = self.durations[(method, path)] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                f"{method} {path}": {
+                    "count": histogram["count"],
+                    "mean_seconds": round(histogram["sum"] / histogram["count"], 6),
+                }
+                for (method, path), histogram in self.durations.items()
+            }
+
+    def render(self, report=None):
+        """ Prometheus exposition text, including the stage timings of the run report if given. """
+        lines = [
+            "# HELP http_requests_total Requests handled, by route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        with self._lock:
+            for (method, path, status), value in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",path="{path}",status="{status}"}} {value}')
+
+            lines += [
+                "# HELP http_request_duration_seconds Request handling time, by route.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, path), histogram in sorted(self.durations.items()):
+                labels = f'method="{method}",path="{path}"'
+                for bound, value in zip(self.buckets, histogram["buckets"]):
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {value}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram["count"]}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram['sum']:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {histogram['count']}")
+
+        if report is not None:
+            lines += [
+                "# HELP pipeline_stage_seconds Time spent in each startup stage of this process.",
+                "# TYPE pipeline_stage_seconds gauge",
+            ]
+            for entry in report.stages:
+                lines.append(f'pipeline_stage_seconds{{stage="{entry["stage"]}"}} {entry["seconds"]}')
+            memory = peak_memory_mb()
+            if memory is not None:
+                lines += [
+                    "# HELP process_peak_memory_megabytes Peak resident memory of this process.",
+                    "# TYPE process_peak_memory_megabytes gauge",
+                    f"process_peak_memory_megabytes {memory}",
+                ]
+        return "\n".join(lines) + "\n"
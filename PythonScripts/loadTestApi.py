@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+#-----------------------------------------------------------------------------------------------------------
+# Load test of the FastAPI endpoints against a local uvicorn instance.
+# The backend is started in a subprocess on a track store built from the given HURDAT2 file (for example
+# one written by generateSyntheticHurdat2.py), every endpoint is hit with a fixed number of requests from
+# a pool of concurrent clients, and latency percentiles, throughput, errors and body sizes are reported.
+# The landfall set, climatology cube and analog index the backend reads or builds are kept in the store
+# directory too, so a load test runs at the scale of the synthetic data and never touches the pipeline's files.
+# Pass --url to test a server that is already running instead.
+#
+# Usage: python PythonScripts/loadTestApi.py --hurdat2 synthetic_hurdat2.txt --requests 200 --concurrency 8
+# -----------------------------------------------------------------------------------------------------------
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(SCRIPTS_DIR, "..", "Old backend files")
+
+LOAD_TEST_STORE_DIR = "load_test_store"
+PORT = 8765
+
+ENDPOINTS = [
+    "/api/hurricanes",
+    "/api/florida-landfalls",
+    "/api/climatology?by=decade",
+    "/api/climatology/return-period?category=1",
+    "/metrics",
+]
+
+# Seconds to wait for the backend to load the store and answer
+STARTUP_TIMEOUT = 300
+
+
+# Function to map the backend's data settings to files inside the load test store directory
+def artifact_paths(store_dir):
+    store_dir = os.path.abspath(store_dir)
+    return {
+        "TRACK_STORE_DIR": store_dir,
+        "LANDFALLS_CSV": os.path.join(store_dir, "florida_landfalls.csv"),
+        "CLIMATOLOGY_CUBE": os.path.join(store_dir, "climatology_cube.npz"),
+        "ANALOG_INDEX": os.path.join(store_dir, "analog_index.npz"),
+    }
+
+
+# Function to save the 'L' fixes inside the Florida bounding box as the landfall set of the climatology
+def build_landfalls(df, landfalls_csv):
+    from climatologyStats import FIRST_LANDFALL_SEASON
+    from extractFloridaLandfallsUsingL import FLORIDA_LAT_MAX, FLORIDA_LAT_MIN, FLORIDA_LON_MAX, FLORIDA_LON_MIN
+    from trackStore import decode_coordinates, wrap_longitudes
+
+    latitudes = decode_coordinates(df["Latitude"])
+    longitudes = wrap_longitudes(decode_coordinates(df["Longitude"]))
+    landfall = (
+        (df["Indicator"] == "L") & (pd.to_numeric(df["Date"], errors="coerce") // 10000 >= FIRST_LANDFALL_SEASON)
+        & latitudes.between(FLORIDA_LAT_MIN, FLORIDA_LAT_MAX) & longitudes.between(FLORIDA_LON_MIN, FLORIDA_LON_MAX)
+    )
+    landfalls = df[landfall].assign(Latitude=latitudes[landfall], Longitude=longitudes[landfall])
+    landfalls.to_csv(landfalls_csv, index=False)
+    return len(landfalls)
+
+
+# Function to build the track store the backend will serve, and its landfall set, from a HURDAT2 file
+def build_store(hurdat2_file, store_dir):
+    sys.path.insert(0, SCRIPTS_DIR)
+    from parseHurricaneData import parse_hurdat2_columns
+    from trackStore import write_track_store
+
+    df, _ = parse_hurdat2_columns(hurdat2_file)
+    write_track_store(df, store_dir, source=hurdat2_file)
+    build_landfalls(df, artifact_paths(store_dir)["LANDFALLS_CSV"])
+    return len(df)
+
+
+# Function to start the backend in a subprocess and wait until it answers
+def start_server(store_dir, port=PORT, timeout=STARTUP_TIMEOUT):
+    env = dict(os.environ, **artifact_paths(store_dir))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend:app", "--app-dir", BACKEND_DIR,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Backend exited with code {server.returncode} during startup")
+        try:
+            with urllib.request.urlopen(url + "/metrics", timeout=5):
+                return server, url
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.5)
+    server.terminate()
+    raise TimeoutError(f"Backend did not answer within {timeout} seconds")
+
+
+# Function to send one request and return (status, seconds, body bytes)
+def fetch(url):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=120) as response:
+            body = response.read()
+            return response.status, time.perf_counter() - start, len(body)
+    except urllib.error.HTTPError as error:
+        return error.code, time.perf_counter() - start, 0
+    except (urllib.error.URLError, ConnectionError):
+        return 0, time.perf_counter() - start, 0
+
+
+def run_load(url, endpoints=ENDPOINTS, requests=100, concurrency=8):
+    """ Hit every endpoint with the given number of requests from concurrent clients, one endpoint at a time. """
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for endpoint in endpoints:
+            fetch(url + endpoint)  # warm-up, not counted
+            start = time.perf_counter()
+            outcomes = list(pool.map(fetch, [url + endpoint] * requests))
+            elapsed = time.perf_counter() - start
+
+            statuses = np.array([status for status, _, _ in outcomes])
+            seconds = np.array([duration for _, duration, _ in outcomes]) * 1000
+            sizes = np.array([size for _, _, size in outcomes])
+            p50, p95, p99 = np.percentile(seconds, [50, 95, 99])
+            results[endpoint] = {
+                "requests": requests,
+                "errors": int((statuses != 200).sum()),
+                "requests_per_second": requests / elapsed,
+                "mean_ms": float(seconds.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "mean_bytes": float(sizes.mean()),
+            }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the hurricane tracker API on a local uvicorn.")
+    parser.add_argument("--hurdat2", help="HURDAT2 file to build the served track store from")
+    parser.add_argument("--store", default=LOAD_TEST_STORE_DIR, help="Track store directory to serve")
+    parser.add_argument("--url", help="Test this running server instead of starting one")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--endpoints", nargs="+", default=ENDPOINTS)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", help="Save the results as JSON")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        if args.hurdat2:
+            print(f"Building {args.store} from {args.hurdat2} ({build_store(args.hurdat2, args.store)} rows)")
+        elif not os.path.exists(artifact_paths(args.store)["LANDFALLS_CSV"]):
+            parser.error(f"{args.store} has no landfall set, build it with --hurdat2")
+        startup = time.perf_counter()
+        server, url = start_server(args.store, args.port)
+        print(f"Backend ready in {time.perf_counter() - startup:.1f}s")
+
+    try:
+        results = run_load(url, args.endpoints, args.requests, args.concurrency)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    for endpoint, result in results.items():
+        print(f"{endpoint}: {result['requests_per_second']:.1f} req/s, p50 {result['p50_ms']:.1f} ms, "
+              f"p95 {result['p95_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms, "
+              f"{result['mean_bytes'] / 1024:.1f} KiB, {result['errors']} errors")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
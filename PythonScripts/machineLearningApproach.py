@@ -1,19 +1,21 @@
 import pandas as pd
-import geopandas as gpd
 import numpy as np
-from shapely.geometry import Point
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, classification_report
+import sys
 
-# Load the dataset
-file_path = "PythonScripts/hurricane_data.csv"
-df = pd.read_csv(file_path)
+from instrumentation import stage, count, profiled, finish_run
+import floridaGeometry
 
-# Load Florida shapefile
+# geopandas, shapely and sklearn are imported on first use, so importing this module stays cheap
+
+# The parsed HURDAT2 data used for training and the file the predicted landfalls are saved to
+INPUT_CSV_FILE = "PythonScripts/hurricane_data.csv"
+OUTPUT_CSV_FILE = "PythonScripts/florida_hurricane_predictions_60_40.csv"
+
+# Share of the rows held out for testing (60% test / 40% train)
+TEST_SIZE = 0.6
+
+# Florida shapefile, loaded on first use
 admin1_shapefile = "./ne_10m_admin_1_states_provinces.shp"
-states = gpd.read_file(admin1_shapefile)
-florida_shape = states[states["name"] == "Florida"].geometry.iloc[0]
 
 # Define Florida bounding box for additional filtering
 FLORIDA_LAT_MIN, FLORIDA_LAT_MAX = 24.5, 31.0
@@ -39,61 +41,89 @@ def is_inside_florida(latitude, longitude):
     if latitude is None or longitude is None:
         return False
 
+    from shapely.geometry import Point
     point = Point(longitude, latitude)
 
     # Check inside Florida shape or within bounding box
-    return florida_shape.contains(point) or (
+    return floridaGeometry.florida_shape(admin1_shapefile).contains(point) or (
         FLORIDA_LAT_MIN <= latitude <= FLORIDA_LAT_MAX and 
         FLORIDA_LON_MIN <= longitude <= FLORIDA_LON_MAX
     )
 
-# Extract 'Year' from 'Date' column
-df["Year"] = df["Date"].astype(str).str[:4].astype(int)
-
-# Filter only hurricanes from 1900 onwards
-df = df[df["Year"] >= 1900].copy()
-
-# Convert Latitude and Longitude values
-df["Latitude"] = df["Latitude"].apply(convert_lat_lon)
-df["Longitude"] = df["Longitude"].apply(convert_lat_lon)
-
-# Fix Longitude values > 180
-df["Longitude"] = df["Longitude"].apply(lambda lon: lon - 360 if lon > 180 else lon)
-
-# Convert Wind Speed & Pressure to Numeric
-df["Max_Wind_Speed"] = pd.to_numeric(df["Max_Wind_Speed"], errors='coerce')
-df["Min_Pressure"] = pd.to_numeric(df["Min_Pressure"], errors='coerce')
-
-# Filter only hurricanes with 'L' indicator (landfall)
-df["Landfall"] = df["Indicator"] == "L"
-
-# Filter hurricanes that made landfall in Florida
-df["In_Florida"] = df.apply(lambda row: is_inside_florida(row["Latitude"], row["Longitude"]), axis=1)
-df = df[df["In_Florida"] == True].copy()
-
-# Selecting Features and Target
-features = ["Latitude", "Longitude", "Max_Wind_Speed", "Min_Pressure"]
-df = df.dropna(subset=features + ["Landfall"])  # Drop rows with missing values
-X = df[features]
-y = df["Landfall"].astype(int)  # Convert boolean to integer for classification
-
-# Split dataset into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.6, random_state=42)
-
-# Train a RandomForest Classifier
-clf = RandomForestClassifier(n_estimators=100, random_state=42)
-clf.fit(X_train, y_train)
-
-# Predictions and Evaluation
-y_pred = clf.predict(X_test)
-accuracy = accuracy_score(y_test, y_pred)
-classification_rep = classification_report(y_test, y_pred)
-
-# Save the predictions to a CSV file
-df["Predicted_Landfall"] = clf.predict(X)
-output_file_path = "PythonScripts/florida_hurricane_predictions_60_40.csv"
-df[df["Predicted_Landfall"] == 1].to_csv(output_file_path, index=False)
-
-print(output_file_path, accuracy)
-# Return the results
-output_file_path, accuracy, classification_rep
+def fit_landfall_model(file_path=INPUT_CSV_FILE, output_file_path=OUTPUT_CSV_FILE, test_size=TEST_SIZE):
+    """ Train the RandomForest landfall classifier and save the rows it predicts as landfalls. """
+    from sklearn.model_selection import train_test_split
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score, classification_report
+
+    # Load the dataset
+    with stage("parse"):
+        df = pd.read_csv(file_path)
+    count("rows_read", len(df))
+
+    with stage("decode", rows=len(df)):
+        # Extract 'Year' from 'Date' column
+        df["Year"] = df["Date"].astype(str).str[:4].astype(int)
+
+        # Filter only hurricanes from 1900 onwards
+        df = df[df["Year"] >= 1900].copy()
+
+        # Convert Latitude and Longitude values
+        df["Latitude"] = df["Latitude"].apply(convert_lat_lon)
+        df["Longitude"] = df["Longitude"].apply(convert_lat_lon)
+
+        # Fix Longitude values > 180
+        df["Longitude"] = df["Longitude"].apply(lambda lon: lon - 360 if lon > 180 else lon)
+
+        # Convert Wind Speed & Pressure to Numeric
+        df["Max_Wind_Speed"] = pd.to_numeric(df["Max_Wind_Speed"], errors='coerce')
+        df["Min_Pressure"] = pd.to_numeric(df["Min_Pressure"], errors='coerce')
+
+        # Filter only hurricanes with 'L' indicator (landfall)
+        df["Landfall"] = df["Indicator"] == "L"
+
+    # Filter hurricanes that made landfall in Florida
+    with stage("classify", rows=len(df)):
+        df["In_Florida"] = df.apply(lambda row: is_inside_florida(row["Latitude"], row["Longitude"]), axis=1)
+        df = df[df["In_Florida"] == True].copy()
+
+    # Selecting Features and Target
+    features = ["Latitude", "Longitude", "Max_Wind_Speed", "Min_Pressure"]
+    df = df.dropna(subset=features + ["Landfall"])  # Drop rows with missing values
+    X = df[features]
+    y = df["Landfall"].astype(int)  # Convert boolean to integer for classification
+
+    # Split dataset into training and testing sets
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
+
+    # Train a RandomForest Classifier
+    with stage("train", rows=len(X_train)):
+        clf = RandomForestClassifier(n_estimators=100, random_state=42)
+        clf.fit(X_train, y_train)
+
+    # Predictions and Evaluation
+    with stage("detect", rows=len(X)):
+        y_pred = clf.predict(X_test)
+        accuracy = accuracy_score(y_test, y_pred)
+        classification_rep = classification_report(y_test, y_pred)
+        df["Predicted_Landfall"] = clf.predict(X)
+    count("landfalls", int(df["Predicted_Landfall"].sum()))
+
+    # Save the predictions to a CSV file
+    with stage("export"):
+        df[df["Predicted_Landfall"] == 1].to_csv(output_file_path, index=False)
+
+    print(output_file_path, accuracy)
+    # Return the results
+    return output_file_path, accuracy, classification_rep
+
+def train_landfall_model(file_path=INPUT_CSV_FILE, output_file_path=OUTPUT_CSV_FILE, test_size=TEST_SIZE, profile=False):
+    """ Run fit_landfall_model, profiled from loading to export when profile is set, and save the run report. """
+    with profiled(profile, "machineLearningApproach"):
+        results = fit_landfall_model(file_path, output_file_path, test_size)
+    finish_run("machineLearningApproach")
+    return results
+
+if __name__ == "__main__":
+    # Pass --profile to save a profile of the whole run in run_reports/
+    train_landfall_model(profile="--profile" in sys.argv)
@@ -1,4 +1,13 @@
 import csv
+import io
+import re
+import sys
+from itertools import compress
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage, finish_run
 
 # The file downlaoded from https://www.nhc.noaa.gov/data/hurdat/hurdat2-1851-2023-051124.txt
 HURDAT2_FILE = "Hurricanes.txt"
@@ -6,8 +15,33 @@ HURDAT2_FILE = "Hurricanes.txt"
 # The output file that will be created and stores all the parsed data
 OUTPUT_CSV_FILE = "hurricane_data.csv"
 
-def parse_hurdat2():
-    with open(HURDAT2_FILE, "r") as file:
+# The file the validation report is written to when the parser runs with --validate
+OUTPUT_ERRORS_CSV_FILE = "hurricane_data_errors.csv"
+
+# Columns of the parsed data, in the order they appear in a HURDAT2 data line (after Basin and Name)
+FIELDNAMES = [
+    "Basin", "Name", "Date", "Time", "Indicator", "Status", "Latitude", "Longitude",
+    "Max_Wind_Speed", "Min_Pressure", "34kt_NE", "34kt_SE", "34kt_SW", "34kt_NW",
+    "50kt_NE", "50kt_SE", "50kt_SW", "50kt_NW", "64kt_NE", "64kt_SE", "64kt_SW", "64kt_NW",
+    "Radius_Max_Wind"
+]
+DATA_FIELDS = FIELDNAMES[2:]
+
+# Values allowed by the HURDAT2 format description
+# https://www.nhc.noaa.gov/data/hurdat/hurdat2-format-atl-1851-2021.pdf
+VALID_INDICATORS = {"", "C", "G", "I", "L", "P", "R", "S", "T", "W"}
+VALID_STATUSES = {"TD", "TS", "HU", "EX", "SD", "SS", "LO", "WV", "DB"}
+MISSING_WIND = -99
+MISSING_VALUE = -999
+
+# A storm header starts with the basin, the cyclone number and the year, e.g. AL092004
+STORM_ID = re.compile(r"[A-Z]{2}\d{6}\s*(?:,|$)")
+
+# Data lines carry 20 values (before the Radius_Max_Wind revision) or 21 values
+VALID_WIDTHS = {len(DATA_FIELDS) - 1, len(DATA_FIELDS)}
+
+def parse_hurdat2(file_path=HURDAT2_FILE):
+    with open(file_path, "r") as file:
         lines = file.readlines()
     count=0
     parsed_data = []
@@ -81,25 +115,162 @@ def parse_hurdat2():
 
 def save_to_csv(parsed_data):
 
-    # Define the fieldnames for the CSV
-    fieldnames = [
-        "Basin", "Name", "Date", "Time", "Indicator", "Status", "Latitude", "Longitude",
-        "Max_Wind_Speed", "Min_Pressure", "34kt_NE", "34kt_SE", "34kt_SW", "34kt_NW",
-        "50kt_NE", "50kt_SE", "50kt_SW", "50kt_NW", "64kt_NE", "64kt_SE", "64kt_SW", "64kt_NW",
-        "Radius_Max_Wind"
-    ]
-
     # Write the parsed data to a CSV file
     with open(OUTPUT_CSV_FILE, mode="w", newline="") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
         writer.writeheader()
         writer.writerows(parsed_data)
 
 
+def parse_hurdat2_columns(file_path=HURDAT2_FILE, validate=False):
+    """ Fast columnar parser, returns (DataFrame, error report) and never drops a line silently.
+
+    The DataFrame has the FIELDNAMES columns as strings and is indexed by the line number of each data row.
+    With validate=False the error report is None, with validate=True it is a DataFrame with
+    Line, Storm and Reason columns built by a vectorized pass over the parsed columns.
+    """
+    with open(file_path, "r") as file:
+        lines = file.read().splitlines()
+    line_numbers = np.arange(1, len(lines) + 1)
+
+    # Every line is classified in one cheap pass: a storm header starts with a storm id (e.g. AL092004),
+    # a data row has at least 8 fields and follows a header, anything else that is not blank is reported
+    stripped = [line.strip() for line in lines]
+    header = np.array([STORM_ID.match(line) is not None for line in stripped], dtype=bool)
+    blank = np.array([not line for line in stripped], dtype=bool)
+    fields = np.array([line.count(",") + 1 for line in stripped], dtype=np.int64)
+    widths = fields - np.array([line.endswith(",") for line in stripped], dtype=bool)
+    storm_number = np.cumsum(header)
+    data = ~header & ~blank & (widths >= 8) & (storm_number > 0)
+
+    # Headers are few, they are split in plain Python: id, name and Data_Count
+    header_parts = [[part.strip() for part in line.split(",")] + ["", ""] for line in compress(stripped, header)]
+    storm_ids = np.array([parts[0] for parts in header_parts], dtype=object)
+    storm_names = np.array([parts[1] for parts in header_parts], dtype=object)
+    owner = storm_number[data] - 1
+
+    # The data rows are split by the C CSV reader, fields missing at the end of a short row are None
+    data_text = "\n".join(compress(stripped, data))
+    width = len(DATA_FIELDS)
+    # One name per field of the widest row, including the empty field after a trailing comma
+    names = list(range(int(fields[data].max()))) if data.any() else []
+    if names:
+        values = pd.read_csv(io.StringIO(data_text), header=None, names=names, dtype=object, skipinitialspace=True,
+                             na_filter=False)
+    else:
+        values = pd.DataFrame(columns=names, dtype=object)
+    values = values.reindex(columns=range(width)).astype(object).where(widths[data][:, None] > np.arange(width), None)
+
+    # Object columns, converting the values to the string dtype costs more than the parsing itself
+    df = pd.DataFrame(np.column_stack([storm_ids[owner], storm_names[owner], values.to_numpy()]).reshape(-1, len(FIELDNAMES)),
+                      columns=FIELDNAMES, index=pd.Index(line_numbers[data], name="Line"), dtype=object)
+    df["Indicator"] = df["Indicator"].replace("", None)
+    if not validate:
+        return df, None
+
+    # The numeric columns are parsed once more by the C reader as numbers, for the range checks
+    # (a file written before the Radius_Max_Wind revision has no 21st column at all)
+    numeric_columns = list(range(6, min(width, len(names))))
+    if numeric_columns:
+        numbers = pd.read_csv(io.StringIO(data_text), header=None, names=names, usecols=numeric_columns,
+                              skipinitialspace=True, low_memory=False)
+    else:
+        numbers = pd.DataFrame(columns=numeric_columns, dtype=np.float64)
+    numbers = numbers.reindex(columns=range(6, width))
+    numbers.columns = DATA_FIELDS[6:]
+    numbers.index = df.index
+
+    headers = pd.DataFrame({
+        "Line": line_numbers[header], "Storm": storm_ids, "Count": [parts[2] for parts in header_parts],
+        "Width": widths[header],
+    })
+    stray = ~header & ~blank & ~data
+    stray_lines = pd.DataFrame({
+        "Line": line_numbers[stray],
+        "Storm": np.where(storm_number[stray] > 0, storm_ids[np.maximum(storm_number[stray] - 1, 0)] if len(storm_ids) else None, None),
+    })
+    return df, validate_hurdat2_columns(df, numbers, widths[data], headers, stray_lines)
+
+
+# Function to check the parsed columns in one vectorized pass and collect (line, storm, reason) records
+def validate_hurdat2_columns(df, numbers, widths, headers, stray_lines):
+    errors = [stray_lines.assign(Reason=np.where(
+        stray_lines["Storm"].notna(), "malformed data row (fewer than 8 fields)", "line before the first storm header"
+    ))]
+
+    # Function to add an error record for every row where the mask is set
+    def flag(mask, reason):
+        mask = np.asarray(mask, dtype=bool)
+        if mask.any():
+            errors.append(pd.DataFrame({"Line": df.index[mask], "Storm": df["Basin"].to_numpy()[mask], "Reason": reason}))
+
+    # Function to convert a column to numbers once, only columns the C reader could not read as numbers need it
+    def numeric(column):
+        values = numbers[column]
+        return values if values.dtype.kind in "if" else pd.to_numeric(values, errors="coerce")
+
+    flag(~np.isin(widths, list(VALID_WIDTHS)), "unexpected number of fields")
+    # Plain comprehensions over the short string fields are much cheaper than the pandas string accessors
+    flag([not (len(value) == 8 and value.isdigit()) for value in df["Date"].tolist()], "malformed date")
+    flag([not (len(value) == 4 and value.isdigit()) for value in df["Time"].tolist()], "malformed time")
+    flag(~df["Indicator"].fillna("").isin(VALID_INDICATORS), "unknown record identifier")
+    flag(~df["Status"].isin(VALID_STATUSES), "unknown status")
+
+    # Coordinates must look like '28.0N' / '94.8W' and fall within the valid ranges
+    for column, hemispheres, limit, reason in (("Latitude", "NS", 90, "latitude out of range"),
+                                               ("Longitude", "EW", 180, "longitude out of range")):
+        coordinates = df[column].tolist()
+        values = pd.to_numeric(pd.Series([value[:-1] for value in coordinates], dtype=object), errors="coerce")
+        flag(~(np.array([value[-1:] in hemispheres and value[-1:] != "" for value in coordinates], dtype=bool)
+               & values.between(0, limit).to_numpy()), reason)
+
+    # Numeric columns must be non-negative or carry the HURDAT2 sentinel for missing values
+    wind = numeric("Max_Wind_Speed").to_numpy()
+    flag(~((wind >= 0) | (wind == MISSING_WIND)), "invalid maximum wind")
+    for position, column in enumerate(DATA_FIELDS[7:], start=7):
+        values = numeric(column).to_numpy()
+        present = widths > position
+        flag(present & ~((values >= 0) | (values == MISSING_VALUE)), f"invalid {column}")
+
+    # A header has exactly the id, the name and the Data_Count, which must match the rows that follow it
+    flag_headers = headers[headers["Width"] != 3]
+    errors.append(flag_headers[["Line", "Storm"]].assign(Reason="malformed storm header"))
+    declared = pd.to_numeric(headers["Count"], errors="coerce").to_numpy()
+    owner = np.searchsorted(headers["Line"].to_numpy(), df.index.to_numpy(), side="right") - 1
+    actual = np.bincount(owner, minlength=len(headers))
+    mismatch = headers[declared != actual]
+    errors.append(mismatch[["Line", "Storm"]].assign(
+        Reason=[f"declared {count} rows, found {found}" for count, found in zip(mismatch["Count"], actual[declared != actual])]
+    ))
+
+    report = pd.concat([error for error in errors if len(error)], ignore_index=True) if any(len(error) for error in errors) \
+        else pd.DataFrame(columns=["Line", "Storm", "Reason"])
+    report = report.astype({"Line": int})
+    return report.sort_values("Line", kind="stable").reset_index(drop=True)
+
+
 if __name__ == "__main__":
 
-    # Parse the HURDAT2 file and save the data to CSV
-    parsed_data = parse_hurdat2()
+    # With --validate the columnar parser is used and the error report is saved next to the data
+    # Usage: python parseHurricaneData.py [hurdat2_file] [--validate]
+    arguments = [argument for argument in sys.argv[1:] if not argument.startswith("--")]
+    hurdat2_file = arguments[0] if arguments else HURDAT2_FILE
+
+    if "--validate" in sys.argv:
+        with stage("parse"):
+            df, errors = parse_hurdat2_columns(hurdat2_file, validate=True)
+        with stage("export", rows=len(df)):
+            df.to_csv(OUTPUT_CSV_FILE, index=False)
+            errors.to_csv(OUTPUT_ERRORS_CSV_FILE, index=False)
+        print(f"{len(df)} rows parsed, {len(errors)} problems saved to {OUTPUT_ERRORS_CSV_FILE}")
+
+    else:
+        # Parse the HURDAT2 file and save the data to CSV
+        with stage("parse"):
+            parsed_data = parse_hurdat2(hurdat2_file)
+
+        # Save the parsed data to CSV
+        with stage("export", rows=len(parsed_data)):
+            save_to_csv(parsed_data)
 
-    # Save the parsed data to CSV
-    save_to_csv(parsed_data)
+    finish_run("parseHurricaneData")
@@ -0,0 +1,202 @@
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+import floridaGeometry
+from instrumentation import stage, count, finish_run
+from resampleTracks import great_circle_miles
+from trackStore import decode_coordinates, wrap_longitudes
+
+#-----------------------------------------------------------------------------------------------------------
+# Reconciliation of the three Florida landfall answers:
+#   L         - HURDAT2 'L' indicator inside Florida (extractFloridaLandfallsUsingL.py)
+#   geometric - sea-to-land crossing without the indicator (extractFloridaLandFallsWithoutL.py)
+#   ml        - RandomForest predictions (machineLearningApproach.py)
+# The parsed data is read and decoded once, the Florida geometry tests run once as vectorized point-in-polygon
+# calls, and the three detectors are column expressions over that shared frame. Their detections are then
+# joined per storm with a time tolerance, and agreement metrics and the disagreements are reported.
+# -----------------------------------------------------------------------------------------------------------
+
+INPUT_CSV_FILE = "PythonScripts/hurricane_data.csv"
+OUTPUT_EVENTS_CSV = "PythonScripts/landfall_reconciliation.csv"
+OUTPUT_DISAGREEMENTS_CSV = "PythonScripts/landfall_disagreements.csv"
+
+METHODS = ["L", "geometric", "ml"]
+
+# Detections of the same storm within this many hours are treated as the same landfall
+TOLERANCE_HOURS = 12
+
+# Same limits as the extractors
+FLORIDA_LAT_MIN, FLORIDA_LAT_MAX = 24.5, 31.0
+FLORIDA_LON_MIN, FLORIDA_LON_MAX = -87.6, -79.8
+MIN_YEAR = 1900
+MAX_STEP_MILES = 100
+ML_TEST_SIZE = 0.6
+
+
+def decode_frame(df):
+    """ Decode the parsed HURDAT2 columns once: coordinates, numbers, year and timestamp. """
+    df = df.copy()
+    df["Year"] = pd.to_numeric(df["Date"].astype(str).str[:4], errors="coerce")
+    df["Latitude"] = decode_coordinates(df["Latitude"])
+    df["Longitude"] = wrap_longitudes(decode_coordinates(df["Longitude"]))
+    df["Max_Wind_Speed"] = pd.to_numeric(df["Max_Wind_Speed"], errors="coerce")
+    df["Min_Pressure"] = pd.to_numeric(df["Min_Pressure"], errors="coerce")
+    df["Timestamp"] = pd.to_datetime(
+        df["Date"].astype(str) + df["Time"].astype(str).str.zfill(4), format="%Y%m%d%H%M", errors="coerce"
+    )
+    return df
+
+
+def classify_geometry(df, shapefile=floridaGeometry.ADMIN1_SHAPEFILE):
+    """ Add the Florida geometry flags every detector needs, computed once for all rows. """
+    import shapely
+
+    shape = floridaGeometry.florida_shape(shapefile)
+    buffer = floridaGeometry.florida_buffer(shapefile)
+    shapely.prepare(shape)
+    shapely.prepare(buffer)
+    latitudes = df["Latitude"].to_numpy(dtype=np.float64)
+    longitudes = df["Longitude"].to_numpy(dtype=np.float64)
+
+    df["In_Shape"] = shapely.contains_xy(shape, longitudes, latitudes)
+    # Points within 0.05 degrees of the border are inside the 0.05 degree buffer, so one test covers both
+    df["Near_Land"] = shapely.contains_xy(buffer, longitudes, latitudes)
+    df["In_Box"] = (
+        df["Latitude"].between(FLORIDA_LAT_MIN, FLORIDA_LAT_MAX) & df["Longitude"].between(FLORIDA_LON_MIN, FLORIDA_LON_MAX)
+    ).to_numpy()
+    return df
+
+
+# Detector of extractFloridaLandfallsUsingL.py: 'L' rows inside the Florida shape or bounding box
+def detect_using_l(df):
+    mask = (df["Indicator"] == "L") & (df["Year"] >= MIN_YEAR) & (df["In_Shape"] | df["In_Box"])
+    return df[mask]
+
+
+# Detector of extractFloridaLandFallsWithoutL.py: off land, then on land twice, with short steps
+# Like the script, the previous/next rows are taken over the whole frame, not per storm
+def detect_geometric(df):
+    df = df[df["Year"] >= MIN_YEAR]
+    near = df["Near_Land"]
+    prev_distance = great_circle_miles(df["Latitude"].shift(1), df["Longitude"].shift(1), df["Latitude"], df["Longitude"])
+    next_distance = great_circle_miles(df["Latitude"], df["Longitude"], df["Latitude"].shift(-1), df["Longitude"].shift(-1))
+    mask = (
+        (near.shift(1) == False) & near & (near.shift(-1) == True)
+        & ((prev_distance < MAX_STEP_MILES) | (next_distance < MAX_STEP_MILES))
+    )
+    return df[mask].drop_duplicates(subset=["Basin", "Date", "Latitude", "Longitude"], keep="first")
+
+
+# Detector of machineLearningApproach.py: RandomForest trained on the rows inside Florida
+def detect_ml(df, test_size=ML_TEST_SIZE):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+
+    features = ["Latitude", "Longitude", "Max_Wind_Speed", "Min_Pressure"]
+    df = df[(df["Year"] >= MIN_YEAR) & (df["In_Shape"] | df["In_Box"])].dropna(subset=features)
+    y = (df["Indicator"] == "L").astype(int)
+    X_train, _, y_train, _ = train_test_split(df[features], y, test_size=test_size, random_state=42)
+    clf = RandomForestClassifier(n_estimators=100, random_state=42)
+    clf.fit(X_train, y_train)
+    return df[clf.predict(df[features]) == 1]
+
+
+def match_detections(detections, tolerance_hours=TOLERANCE_HOURS):
+    """ Join the detections of every method into landfall events, per storm within the time tolerance.
+
+    detections maps a method name to its detected rows. Returns one row per event with a boolean column per
+    method, the first detection time and position, and the time offset of every method from that time.
+    """
+    frames = [rows.assign(Method=method) for method, rows in detections.items() if len(rows)]
+    columns = ["Basin", "Name", "Timestamp", "Latitude", "Longitude", "Max_Wind_Speed", "Method"]
+    if not frames:
+        return pd.DataFrame(columns=["Event", "Basin", "Name", "Timestamp", "Latitude", "Longitude"] + METHODS)
+    rows = pd.concat([frame[columns] for frame in frames], ignore_index=True)
+    rows = rows.sort_values(["Basin", "Timestamp"], kind="stable").reset_index(drop=True)
+
+    # A new event starts at a new storm or after a gap longer than the tolerance
+    gap = rows["Timestamp"].diff() > pd.Timedelta(hours=tolerance_hours)
+    new_storm = rows["Basin"] != rows["Basin"].shift()
+    rows["Event"] = (new_storm | gap).cumsum() - 1
+
+    events = rows.groupby("Event").agg(
+        Basin=("Basin", "first"), Name=("Name", "first"), Timestamp=("Timestamp", "first"),
+        Latitude=("Latitude", "first"), Longitude=("Longitude", "first"), Max_Wind_Speed=("Max_Wind_Speed", "max"),
+    )
+    found = pd.crosstab(rows["Event"], rows["Method"]).reindex(columns=list(detections), fill_value=0) > 0
+    offsets = (rows["Timestamp"] - events["Timestamp"].reindex(rows["Event"]).to_numpy()).dt.total_seconds() / 3600
+    hours = offsets.groupby([rows["Event"], rows["Method"]]).min().unstack().reindex(columns=list(detections))
+    hours.columns = [f"{method}_Offset_Hours" for method in hours.columns]
+    return pd.concat([events, found, hours], axis=1).reset_index()
+
+
+def agreement_metrics(events, methods=METHODS):
+    """ Event counts, pairwise agreement (Jaccard) and recall/precision of every method against 'L'. """
+    metrics = {"events": int(len(events)), "all_agree": int(events[methods].all(axis=1).sum())}
+    for method in methods:
+        metrics[f"{method}_detections"] = int(events[method].sum())
+    for i, first in enumerate(methods):
+        for second in methods[i + 1:]:
+            both = int((events[first] & events[second]).sum())
+            either = int((events[first] | events[second]).sum())
+            metrics[f"{first}_vs_{second}"] = {
+                "both": both,
+                f"only_{first}": int((events[first] & ~events[second]).sum()),
+                f"only_{second}": int((events[second] & ~events[first]).sum()),
+                "jaccard": both / either if either else None,
+            }
+    reference = events["L"]
+    for method in methods[1:]:
+        hits = int((events[method] & reference).sum())
+        metrics[f"{method}_recall_vs_L"] = hits / int(reference.sum()) if reference.any() else None
+        metrics[f"{method}_precision_vs_L"] = hits / int(events[method].sum()) if events[method].any() else None
+    return metrics
+
+
+def reconcile(file_path=INPUT_CSV_FILE, tolerance_hours=TOLERANCE_HOURS, predictions_csv=None):
+    """ Run the three detectors on one shared frame and reconcile them. Returns (events, metrics). """
+    with stage("parse"):
+        df = pd.read_csv(file_path, dtype=str)
+    count("rows_read", len(df))
+    with stage("decode", rows=len(df)):
+        df = decode_frame(df)
+    with stage("classify", rows=len(df)):
+        df = classify_geometry(df)
+
+    with stage("detect", rows=len(df)):
+        detections = {"L": detect_using_l(df), "geometric": detect_geometric(df)}
+        if predictions_csv:
+            # Reuse saved RandomForest predictions instead of training again
+            detections["ml"] = decode_frame(pd.read_csv(predictions_csv, dtype=str))
+        else:
+            detections["ml"] = detect_ml(df)
+
+    with stage("join"):
+        events = match_detections(detections, tolerance_hours)
+    return events, agreement_metrics(events)
+
+
+# Function to save every event and the events the methods disagree on
+def save_report(events, events_csv=OUTPUT_EVENTS_CSV, disagreements_csv=OUTPUT_DISAGREEMENTS_CSV):
+    events.to_csv(events_csv, index=False)
+    events[~events[METHODS].all(axis=1)].to_csv(disagreements_csv, index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the L-indicator, geometric and ML landfall answers.")
+    parser.add_argument("input", nargs="?", default=INPUT_CSV_FILE, help="Parsed HURDAT2 CSV")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE_HOURS, help="Matching window in hours")
+    parser.add_argument("--predictions", help="Use saved RandomForest predictions instead of training")
+    parser.add_argument("--events", default=OUTPUT_EVENTS_CSV)
+    parser.add_argument("--disagreements", default=OUTPUT_DISAGREEMENTS_CSV)
+    args = parser.parse_args()
+
+    events, metrics = reconcile(args.input, args.tolerance, args.predictions)
+    with stage("export", rows=len(events)):
+        save_report(events, args.events, args.disagreements)
+
+    print(json.dumps(metrics, indent=2))
+    finish_run("reconcileLandfalls")
@@ -0,0 +1,220 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage, finish_run
+from trackStore import MISSING, TRACK_STORE_DIR, open_track_store
+
+#-----------------------------------------------------------------------------------------------------------
+# Resampling of the HURDAT2 tracks to a uniform time step (e.g. 1 hour or 15 minutes).
+# HURDAT2 fixes are 6-hourly plus irregular extra rows at landfalls and intensity peaks. The resampler works
+# on the track store columns and its storm offsets, and interpolates every storm in one vectorized call:
+#   position       - along the great circle between the two surrounding fixes
+#   wind, pressure - linearly, missing values (HURDAT2 sentinels) stay missing
+#   wind radii     - linearly where both surrounding fixes have them
+# The resampled points can be fed back into the land classifier to time landfalls more precisely.
+# -----------------------------------------------------------------------------------------------------------
+
+# Default resampling step in minutes
+STEP_MINUTES = 60
+
+EARTH_RADIUS_MILES = 3958.8
+
+
+# Function to convert latitude/longitude in degrees to unit vectors on the sphere
+def to_unit_vectors(latitudes, longitudes):
+    lat = np.radians(latitudes)
+    lon = np.radians(longitudes)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+# Function to interpolate positions along the great circle between two sets of points (fraction in [0, 1])
+def great_circle_interpolate(lat1, lon1, lat2, lon2, fraction):
+    a = to_unit_vectors(lat1, lon1)
+    b = to_unit_vectors(lat2, lon2)
+    omega = np.arccos(np.clip(np.einsum("ij,ij->i", a, b), -1.0, 1.0))
+    sin_omega = np.sin(omega)
+
+    # Nearly identical points fall back to linear weights to avoid dividing by ~0
+    small = sin_omega < 1e-9
+    safe = np.where(small, 1.0, sin_omega)
+    weight_a = np.where(small, 1.0 - fraction, np.sin((1.0 - fraction) * omega) / safe)
+    weight_b = np.where(small, fraction, np.sin(fraction * omega) / safe)
+    point = weight_a[:, None] * a + weight_b[:, None] * b
+
+    latitudes = np.degrees(np.arctan2(point[:, 2], np.hypot(point[:, 0], point[:, 1])))
+    longitudes = np.degrees(np.arctan2(point[:, 1], point[:, 0]))
+    return latitudes, longitudes
+
+
+# Function to compute great-circle distances in miles between two sets of points
+def great_circle_miles(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+# Function to interpolate a column linearly, treating values below the threshold as missing (NaN)
+def _interpolate_column(values, left, right, fraction, missing_below):
+    values = np.asarray(values, dtype=np.float64)
+    values = np.where(values < missing_below, np.nan, values)
+    return values[left] + (values[right] - values[left]) * fraction
+
+
+class ResampledTracks:
+    """ Interpolated track points of several storms, stored as flat columns with per-storm offsets. """
+
+    __slots__ = ("storm", "minutes", "latitude", "longitude", "max_wind", "min_pressure", "radii", "start", "count")
+
+    def __init__(self, storm, minutes, latitude, longitude, max_wind, min_pressure, radii):
+        self.storm = storm
+        self.minutes = minutes
+        self.latitude = latitude
+        self.longitude = longitude
+        self.max_wind = max_wind
+        self.min_pressure = min_pressure
+        self.radii = radii
+
+        # Offsets of every storm's points, the same layout as the storm table of the track store
+        boundaries = np.flatnonzero(np.r_[True, storm[1:] != storm[:-1]]) if len(storm) else np.array([], dtype=int)
+        self.start = boundaries
+        self.count = np.diff(np.r_[boundaries, len(storm)])
+
+    def __len__(self):
+        return len(self.storm)
+
+    def times(self):
+        return self.minutes.astype("datetime64[m]")
+
+    def to_frame(self, store=None):
+        """ DataFrame of the resampled points, with storm ids and names when the store is given. """
+        df = pd.DataFrame({
+            "Storm": self.storm,
+            "Time": self.times(),
+            "Latitude": self.latitude,
+            "Longitude": self.longitude,
+            "Max_Wind_Speed": self.max_wind,
+            "Min_Pressure": self.min_pressure,
+        })
+        if store is not None:
+            df.insert(1, "Storm_Id", store.storms["storm_id"][self.storm].astype(str))
+            df.insert(2, "Name", store.storms["name"][self.storm].astype(str))
+        return df
+
+
+def interpolate_at(store, target_storm, target_minutes):
+    """ Interpolate the tracks of the given storms at the given times (minutes since 1970), in one call.
+
+    target_storm holds storm positions in the store and target_minutes the times, in any order.
+    Times outside a storm's track are clamped to its first/last fix. Rows with an invalid date or time
+    are skipped, and storms without any valid row give NaN positions.
+    """
+    tracks = store.tracks
+    target_storm = np.asarray(target_storm, dtype=np.int64)
+    target_minutes = np.asarray(target_minutes)
+    minutes = store.minutes()
+    rows = np.flatnonzero(~np.isnan(minutes))
+    row_storm = store.row_storm()[rows]
+    row_minutes = minutes[rows].astype(np.int64)
+
+    # Range of every target storm's valid rows, as positions in rows
+    first = np.searchsorted(row_storm, target_storm, side="left")
+    last = np.searchsorted(row_storm, target_storm, side="right") - 1
+    empty = last < first
+
+    # One monotonic key across all storms: storm position first, then the time within the storm
+    offset = row_minutes.min() if len(rows) else 0
+    span = int(row_minutes.max() - offset) + 1 if len(rows) else 1
+    row_key = row_storm.astype(np.int64) * span + (row_minutes - offset)
+    target_key = target_storm * span + np.clip(target_minutes - offset, 0, span - 1).astype(np.int64)
+
+    # Left fix of the segment every target falls in, kept within the target's own storm
+    left = np.searchsorted(row_key, target_key, side="right") - 1
+    left = np.where(empty, 0, np.clip(left, first, last))
+    right = np.where(empty, 0, np.minimum(left + 1, last))
+    if len(rows) == 0:
+        rows = row_minutes = np.zeros(1, dtype=np.int64)
+
+    duration = (row_minutes[right] - row_minutes[left]).astype(np.float64)
+    fraction = np.where(duration > 0, (target_minutes - row_minutes[left]) / np.where(duration > 0, duration, 1.0), 0.0)
+    fraction = np.where(empty, np.nan, np.clip(fraction, 0.0, 1.0))
+    left, right = rows[left], rows[right]
+
+    latitude, longitude = great_circle_interpolate(
+        tracks["latitude"][left].astype(np.float64), tracks["longitude"][left].astype(np.float64),
+        tracks["latitude"][right].astype(np.float64), tracks["longitude"][right].astype(np.float64),
+        fraction,
+    )
+    max_wind = _interpolate_column(tracks["max_wind"], left, right, fraction, 0)
+    min_pressure = _interpolate_column(tracks["min_pressure"], left, right, fraction, 0)
+    radii = _interpolate_column(tracks["radii"], left, right, fraction[:, None], 0)
+    radii = np.where(np.isnan(radii), MISSING, np.rint(radii)).astype(np.int16)
+
+    return ResampledTracks(target_storm, target_minutes, latitude, longitude, max_wind, min_pressure, radii)
+
+
+def resample_tracks(store, step_minutes=STEP_MINUTES, storms=None):
+    """ Resample the given storms (default: all) to a uniform step, starting at each storm's first valid fix. """
+    storms = np.arange(len(store)) if storms is None else np.asarray(storms, dtype=np.int64)
+    minutes = store.minutes()
+    starts = store.storms["start"].astype(np.int64)
+    first = np.fmin.reduceat(minutes, starts)[storms] if len(starts) else np.zeros(0)
+    last = np.fmax.reduceat(minutes, starts)[storms] if len(starts) else np.zeros(0)
+
+    # Number of resampled points of every storm and the flat target arrays, built without a per-storm loop
+    # (a storm without any valid date gets no points)
+    dated = ~np.isnan(first)
+    first = np.where(dated, first, 0).astype(np.int64)
+    counts = np.where(dated, (np.where(dated, last, 0).astype(np.int64) - first) // step_minutes + 1, 0)
+    target_storm = np.repeat(storms, counts)
+    position = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    target_minutes = np.repeat(first, counts) + position * step_minutes
+
+    return interpolate_at(store, target_storm, target_minutes)
+
+
+def classify_land(latitudes, longitudes, shape=None):
+    """ Vectorized point-in-polygon test, by default against the buffered Florida shape. """
+    import shapely
+
+    if shape is None:
+        import floridaGeometry
+        shape = floridaGeometry.florida_buffer()
+    shapely.prepare(shape)
+    return shapely.contains_xy(shape, longitudes, latitudes)
+
+
+def detect_landfalls(resampled, store, shape=None):
+    """ First point of every sea-to-land crossing of the resampled tracks, one row per crossing. """
+    on_land = classify_land(resampled.latitude, resampled.longitude, shape)
+    same_storm = np.r_[False, resampled.storm[1:] == resampled.storm[:-1]]
+    crossing = on_land & same_storm & ~np.r_[False, on_land[:-1]]
+
+    df = resampled.to_frame(store)[crossing]
+    return df.reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resample the HURDAT2 tracks to a uniform time step.")
+    parser.add_argument("--store", default=TRACK_STORE_DIR, help="Track store directory")
+    parser.add_argument("--step", type=int, default=STEP_MINUTES, help="Step in minutes (e.g. 60 or 15)")
+    parser.add_argument("--min-year", type=int, default=1900)
+    parser.add_argument("--output", default="resampled_tracks.csv", help="CSV file for the resampled points")
+    parser.add_argument("--landfalls", help="Also detect Florida landfalls on the resampled tracks and save them here")
+    args = parser.parse_args()
+
+    store = open_track_store(args.store)
+    storms = np.flatnonzero(store.storms["year"] >= args.min_year)
+    with stage("resample", rows=int(store.storms["count"][storms].sum())):
+        resampled = resample_tracks(store, args.step, storms)
+    with stage("export", rows=len(resampled)):
+        resampled.to_frame(store).to_csv(args.output, index=False)
+
+    if args.landfalls:
+        with stage("classify", rows=len(resampled)):
+            landfalls = detect_landfalls(resampled, store)
+        landfalls.to_csv(args.landfalls, index=False)
+        print(f"{len(landfalls)} landfalls saved to {args.landfalls}")
+
+    finish_run("resampleTracks")
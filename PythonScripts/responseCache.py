@@ -0,0 +1,126 @@
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+#-----------------------------------------------------------------------------------------------------------
+# HTTP response caching for the API. The data behind the endpoints changes about once a year, so:
+#   - every response gets a strong ETag derived from the dataset version, the path and the query parameters,
+#     which can be computed before any work is done, so a matching If-None-Match is answered with a 304
+#     (the gzip-encoded body carries the same ETag with a "-gz" suffix)
+#   - responses carry a long-lived Cache-Control header
+#   - the serialized JSON body and its gzip-compressed copy are kept in a small LRU keyed by the ETag,
+#     so a repeated query costs a dictionary lookup instead of a recomputation and a re-serialization
+# -----------------------------------------------------------------------------------------------------------
+
+# Clients may reuse a response for a week, then revalidate it with its ETag
+CACHE_CONTROL = "public, max-age=604800"
+
+# Number of distinct responses (path and parameter combinations) kept in memory
+MAX_ENTRIES = 64
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+# Suffix of the ETag of a gzip-encoded body, the two encodings of a response must not share a strong ETag
+GZIP_ETAG_SUFFIX = "-gz"
+
+
+# Function to hash the files that define the served data (plus any extra settings) into a version string
+def dataset_version(paths, extra=""):
+    digest = hashlib.sha256(extra.encode())
+    for path in paths:
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+# Function to build the strong ETag of a response from the dataset version, the path and the query parameters
+def make_etag(version, path, params):
+    canonical = "&".join(f"{key}={value}" for key, value in sorted(params))
+    return '"' + hashlib.sha256(f"{version}|{path}|{canonical}".encode()).hexdigest()[:32] + '"'
+
+
+# Function to derive the ETag of the gzip-encoded body from the ETag of the identity body
+def gzip_etag(etag):
+    return etag[:-1] + GZIP_ETAG_SUFFIX + '"'
+
+
+# Function to check an If-None-Match header against an ETag in either encoding (a list of tags, '*', weak
+# tags compare equal), returns the matching form of the ETag or None
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return None
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if gzip_etag(etag) in tags:
+        return gzip_etag(etag)
+    return etag if etag in tags or "*" in tags else None
+
+
+# Function to check whether a client accepts gzip-encoded bodies
+def accepts_gzip(accept_encoding):
+    if not accept_encoding:
+        return False
+    for coding in accept_encoding.split(","):
+        name, _, quality = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return quality.strip().replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class CachedBody:
+    """ A serialized JSON response body and, when it is large enough, its gzip-compressed copy. """
+
+    __slots__ = ("etag", "body", "gzip_body")
+
+    def __init__(self, etag, content):
+        self.etag = etag
+        self.body = json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=6) if len(self.body) >= MIN_COMPRESS_BYTES else None
+
+
+class ResponseCache:
+    """ Thread-safe LRU of CachedBody objects keyed by ETag, with hit and miss counters. """
+
+    def __init__(self, maxsize=MAX_ENTRIES):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+
+    def get(self, etag, build):
+        """ The cached body for the ETag, serializing build() on a miss. """
+        with self._lock:
+            entry = self.entries.get(etag)
+            if entry is not None:
+                self.entries.move_to_end(etag)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Built outside the lock so a slow endpoint does not block cached ones
+        entry = CachedBody(etag, build())
+        with self._lock:
+            self.entries[etag] = entry
+            self.entries.move_to_end(etag)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return entry
+
+    def count_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": sum(len(entry.body) + len(entry.gzip_body or b"") for entry in self.entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+            }
@@ -0,0 +1,260 @@
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from instrumentation import stage, finish_run
+from resampleTracks import interpolate_at
+from trackStore import TRACK_STORE_DIR, open_track_store, track_minutes
+
+#-----------------------------------------------------------------------------------------------------------
+# Analog search: historical storms whose track looked like a given (partial) track.
+# Every historical track is cut into windows of WINDOW_HOURS ending at each of its fixes, and every window is
+# resampled to POINTS positions and intensities at STEP_HOURS spacing and flattened into one vector. The
+# vectors of all storms form one float32 matrix, and a query is the same kind of vector built from the last
+# WINDOW_HOURS of the given track. Nearest neighbours are found by brute force with one matrix-vector product
+# (|x - q|^2 = |x|^2 - 2 x.q + |q|^2), which over a few hundred thousand windows takes milliseconds.
+# The index is saved with a hash per season and rebuilt incrementally: only seasons that are new or whose
+# tracks changed in the store are embedded again.
+#
+# Usage: python PythonScripts/stormAnalogs.py --storm AL092004 --until 200409151800 --k 10
+# -----------------------------------------------------------------------------------------------------------
+
+INDEX_FILE = "PythonScripts/analog_index.npz"
+
+# Length of the compared track window and the spacing of its points
+WINDOW_HOURS = 48
+STEP_HOURS = 6
+POINTS = WINDOW_HOURS // STEP_HOURS + 1
+
+# Features of every point: latitude, scaled longitude and scaled wind
+FEATURES = 3
+
+# Longitude degrees are shortened to their length at Florida's latitude, and 20 knots weigh like 1 degree
+LONGITUDE_SCALE = float(np.cos(np.radians(27.0)))
+WIND_SCALE = 1 / 20
+
+# Candidate windows looked at per requested analog, so several windows of one storm do not crowd out others
+CANDIDATES_PER_ANALOG = 20
+
+
+# Function to turn positions and winds (arrays of shape (..., POINTS)) into feature vectors
+def to_features(latitudes, longitudes, winds):
+    features = np.stack([latitudes, longitudes * LONGITUDE_SCALE, winds * WIND_SCALE], axis=-1)
+    return features.reshape(features.shape[:-2] + (POINTS * FEATURES,)).astype(np.float32)
+
+
+# Function to hash every storm's track rows and combine them into one hash per season
+def season_hashes(store):
+    storms = store.storms
+    hashes = {}
+    for i in range(len(storms)):
+        digest = hashlib.sha256(storms["storm_id"][i].tobytes() + store.storm_rows(i).tobytes()).hexdigest()
+        hashes.setdefault(int(storms["year"][i]), []).append(digest)
+    return {year: hashlib.sha256("".join(sorted(digests)).encode()).hexdigest()[:16] for year, digests in hashes.items()}
+
+
+def embed_windows(store, storms):
+    """ Feature vectors of the windows ending at every fix of the given storms (positions in the store).
+
+    Returns (vectors, storm positions, window end minutes). Windows ending at a fix with an invalid date
+    or time, or with a missing wind, are left out.
+    """
+    storms = np.asarray(storms, dtype=np.int64)
+    counts = store.storms["count"][storms].astype(np.int64)
+    rows = np.repeat(store.storms["start"][storms].astype(np.int64), counts) + (
+        np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    )
+    window_storm = np.repeat(storms, counts)
+    end_minutes = store.minutes()[rows]
+    dated = ~np.isnan(end_minutes)
+    rows, window_storm, end_minutes = rows[dated], window_storm[dated], end_minutes[dated].astype(np.int64)
+
+    # POINTS targets per window, oldest first; times before a storm's first fix are clamped to it
+    offsets = (np.arange(POINTS) - (POINTS - 1)) * STEP_HOURS * 60
+    target_minutes = (end_minutes[:, None] + offsets).ravel()
+    target_storm = np.repeat(window_storm, POINTS)
+    resampled = interpolate_at(store, target_storm, target_minutes)
+
+    shape = (len(rows), POINTS)
+    vectors = to_features(
+        resampled.latitude.reshape(shape), resampled.longitude.reshape(shape), resampled.max_wind.reshape(shape)
+    )
+    valid = ~np.isnan(vectors).any(axis=1)
+    return vectors[valid], window_storm[valid], end_minutes[valid]
+
+
+def embed_query(latitudes, longitudes, winds, minutes):
+    """ Feature vector of the last WINDOW_HOURS of a track, and the mask of the features it covers.
+
+    Points of the window before the track's first fix are not covered and are left out of the distance,
+    and so is the wind when the track has none.
+    """
+    minutes = np.asarray(minutes, dtype=np.float64)
+    winds = np.asarray(winds, dtype=np.float64)
+    if len(minutes) < 2 or np.any(np.diff(minutes) <= 0):
+        raise ValueError("a track needs at least two fixes in increasing time order")
+    targets = minutes[-1] + (np.arange(POINTS) - (POINTS - 1)) * STEP_HOURS * 60
+
+    known = ~np.isnan(winds)
+    wind = np.interp(targets, minutes[known], winds[known]) if known.any() else np.zeros(POINTS)
+    vector = to_features(np.interp(targets, minutes, latitudes), np.interp(targets, minutes, longitudes), wind)
+
+    mask = np.repeat(targets >= minutes[0], FEATURES).reshape(POINTS, FEATURES)
+    mask[:, 2] &= bool(known.any())
+    return vector, mask.ravel()
+
+
+class AnalogIndex:
+    """ Window feature vectors of all historical storms, with their storm ids, names, years and end times. """
+
+    __slots__ = ("vectors", "norms", "storm_ids", "names", "years", "end_minutes", "season_hashes")
+
+    def __init__(self, vectors, storm_ids, names, years, end_minutes, season_hashes):
+        self.vectors = vectors
+        self.norms = np.einsum("ij,ij->i", vectors, vectors)
+        self.storm_ids = storm_ids
+        self.names = names
+        self.years = years
+        self.end_minutes = end_minutes
+        self.season_hashes = season_hashes
+
+    def __len__(self):
+        return len(self.vectors)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros((0, POINTS * FEATURES), dtype=np.float32), np.array([], dtype="S8"),
+                   np.array([], dtype="S16"), np.array([], dtype=np.int16), np.array([], dtype=np.int64), {})
+
+    def save(self, path=INDEX_FILE):
+        temp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temp_path, vectors=self.vectors, storm_ids=self.storm_ids, names=self.names, years=self.years,
+                 end_minutes=self.end_minutes, season_hashes=json.dumps(self.season_hashes),
+                 layout=json.dumps([WINDOW_HOURS, STEP_HOURS, LONGITUDE_SCALE, WIND_SCALE]))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        """ The saved index, or an empty one if it was built with other window settings. """
+        with np.load(path) as data:
+            if json.loads(str(data["layout"])) != [WINDOW_HOURS, STEP_HOURS, LONGITUDE_SCALE, WIND_SCALE]:
+                return cls.empty()
+            hashes = {int(year): value for year, value in json.loads(str(data["season_hashes"])).items()}
+            return cls(data["vectors"], data["storm_ids"], data["names"], data["years"], data["end_minutes"], hashes)
+
+    def update(self, store):
+        """ Re-embed only the seasons that are new or changed in the store. Returns the years re-embedded. """
+        hashes = season_hashes(store)
+        changed = sorted(
+            year for year in set(hashes) | set(self.season_hashes) if hashes.get(year) != self.season_hashes.get(year)
+        )
+        if not changed:
+            return []
+
+        keep = ~np.isin(self.years, changed)
+        storms = np.flatnonzero(np.isin(store.storms["year"], changed))
+        vectors, window_storm, end_minutes = embed_windows(store, storms)
+
+        self.vectors = np.concatenate([self.vectors[keep], vectors])
+        self.norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+        self.storm_ids = np.concatenate([self.storm_ids[keep], store.storms["storm_id"][window_storm]])
+        self.names = np.concatenate([self.names[keep], store.storms["name"][window_storm]])
+        self.years = np.concatenate([self.years[keep], store.storms["year"][window_storm].astype(np.int16)])
+        self.end_minutes = np.concatenate([self.end_minutes[keep], end_minutes])
+        self.season_hashes = hashes
+        return changed
+
+    def search(self, vector, mask=None, k=10, exclude=None):
+        """ The k storms with the closest window to the query vector, one (best) window per storm.
+
+        mask selects the features the distance is computed over (see embed_query). Returns a list of
+        dicts with the storm id, name, year, end time of the matching window and the distance.
+        """
+        if len(self.vectors) == 0:
+            return []
+        if mask is None or mask.all():
+            distances = self.norms - 2 * (self.vectors @ vector) + vector @ vector
+        else:
+            vectors = self.vectors[:, mask]
+            query = vector[mask]
+            distances = np.einsum("ij,ij->i", vectors, vectors) - 2 * (vectors @ query) + query @ query
+        if exclude is not None:
+            distances[self.storm_ids == exclude.encode()] = np.inf
+
+        # Best window per storm among the closest candidates, widening to all windows if too few storms show up
+        candidates = min(len(distances), k * CANDIDATES_PER_ANALOG)
+        for rows in (np.argpartition(distances, candidates - 1)[:candidates], np.arange(len(distances))):
+            rows = rows[np.argsort(distances[rows], kind="stable")]
+            rows = rows[np.isfinite(distances[rows])]
+            _, first = np.unique(self.storm_ids[rows], return_index=True)
+            best = rows[np.sort(first)][:k]
+            if len(best) == k or len(rows) == len(distances):
+                break
+
+        return [
+            {
+                "storm_id": self.storm_ids[row].decode(),
+                "name": self.names[row].decode(),
+                "year": int(self.years[row]),
+                "window_end": str(self.end_minutes[row].astype("datetime64[m]")),
+                "distance": float(np.sqrt(max(distances[row], 0.0))),
+            }
+            for row in best
+        ]
+
+
+def build_analog_index(store_dir=TRACK_STORE_DIR, index_path=INDEX_FILE):
+    """ Load the saved index (if any), bring it up to date with the track store and save it. """
+    index = AnalogIndex.load(index_path) if os.path.exists(index_path) else AnalogIndex.empty()
+    changed = index.update(open_track_store(store_dir))
+    if changed or not os.path.exists(index_path):
+        index.save(index_path)
+    return index, changed
+
+
+def find_analogs(index, latitudes, longitudes, winds, minutes, k=10, exclude=None):
+    """ Top-k historical analogs of a partial track given as positions, winds and times (minutes since 1970). """
+    vector, mask = embed_query(latitudes, longitudes, winds, minutes)
+    return index.search(vector, mask, k, exclude)
+
+
+# Function to take the fixes of a stored storm up to a time (YYYYMMDDHHMM), used as a query from the CLI
+def storm_track(store, storm_id, until=None):
+    position = store.find(storm_id)
+    if position is None:
+        raise ValueError(f"Unknown storm {storm_id}")
+    rows = store.storm_rows(position)
+    minutes = track_minutes(rows["date"], rows["time"])
+    keep = ~np.isnan(minutes)
+    if until is not None:
+        keep &= minutes <= track_minutes([until // 10000], [until % 10000])[0]
+    rows, minutes = rows[keep], minutes[keep]
+    winds = np.where(rows["max_wind"] < 0, np.nan, rows["max_wind"]).astype(np.float64)
+    return rows["latitude"].astype(np.float64), rows["longitude"].astype(np.float64), winds, minutes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the storm analog index and search it.")
+    parser.add_argument("--store", default=TRACK_STORE_DIR, help="Track store directory")
+    parser.add_argument("--index", default=INDEX_FILE, help="Index file to update")
+    parser.add_argument("--storm", help="Find the analogs of this stored storm (e.g. AL092004)")
+    parser.add_argument("--until", type=int, help="Only use the storm's fixes up to YYYYMMDDHHMM")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    with stage("build_index"):
+        index, changed = build_analog_index(args.store, args.index)
+    print(f"{len(changed)} seasons embedded, {len(index)} windows in the index")
+
+    if args.storm:
+        latitudes, longitudes, winds, minutes = storm_track(open_track_store(args.store), args.storm, args.until)
+        with stage("search", rows=len(index)):
+            analogs = find_analogs(index, latitudes, longitudes, winds, minutes, args.k, exclude=args.storm)
+        for analog in analogs:
+            print(f"{analog['storm_id']} {analog['name']:<12} window ending {analog['window_end']}  "
+                  f"distance {analog['distance']:.2f}")
+
+    finish_run("stormAnalogs")
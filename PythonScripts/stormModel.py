@@ -0,0 +1,118 @@
+import numpy as np
+
+from trackStore import MISSING
+
+#-----------------------------------------------------------------------------------------------------------
+# Compact in-memory storm model for the API path.
+# A Storm keeps NumPy column slices of its track (views into the track store, not copies) instead of a
+# list of per-entry dicts, and only builds the dict/JSON shape the frontend expects when it is serialized.
+# -----------------------------------------------------------------------------------------------------------
+
+
+class Storm:
+    """ One storm and the column slices of its track. """
+
+    __slots__ = (
+        "storm_id", "name", "year",
+        "date", "time", "indicator", "status",
+        "latitude", "longitude", "max_wind", "min_pressure",
+    )
+
+    def __init__(self, storm_id, name, year, rows):
+        self.storm_id = storm_id
+        self.name = name
+        self.year = year
+        self.date = rows["date"]
+        self.time = rows["time"]
+        self.indicator = rows["indicator"]
+        self.status = rows["status"]
+        self.latitude = rows["latitude"]
+        self.longitude = rows["longitude"]
+        self.max_wind = rows["max_wind"]
+        self.min_pressure = rows["min_pressure"]
+
+    @classmethod
+    def from_store(cls, store, i):
+        """ Build the i-th storm of a TrackStore without copying its track. """
+        record = store.storms[i]
+        return cls(
+            record["storm_id"].decode(),
+            record["name"].decode(),
+            int(record["year"]),
+            store.storm_rows(i),
+        )
+
+    def __len__(self):
+        return len(self.date)
+
+    def __repr__(self):
+        return f"Storm({self.storm_id!r}, {self.name!r}, {len(self)} points)"
+
+    def valid_positions(self):
+        """ Mask of the points with a finite, in-range position (the store keeps unparsable ones as NaN). """
+        latitude = self.latitude.astype(np.float64)
+        longitude = self.longitude.astype(np.float64)
+        with np.errstate(invalid="ignore"):
+            return (np.abs(latitude) <= 90) & (np.abs(longitude) <= 180)
+
+    def points(self):
+        """ Iterate (date, time, latitude, longitude, max_wind, min_pressure) tuples as plain Python values.
+
+        Points without a valid position are skipped, as parse_hurdat2 in backend.py used to skip them.
+        """
+        valid = self.valid_positions()
+        return zip(
+            self.date[valid].tolist(), self.time[valid].tolist(),
+            self.latitude[valid].tolist(), self.longitude[valid].tolist(),
+            self.max_wind[valid].tolist(), self.min_pressure[valid].tolist(),
+        )
+
+    def segments(self):
+        """ Iterate (previous, current) point pairs, the shape the landfall detection walks. """
+        points = list(self.points())
+        return zip(points, points[1:])
+
+    def landfall_positions(self):
+        """ Row positions of the points flagged with the HURDAT2 'L' indicator. """
+        return np.flatnonzero(self.indicator == b"L")
+
+    def entries(self):
+        """ Track entries in the same shape parse_hurdat2 in backend.py used to build. """
+        statuses = [status.decode() for status in self.status[self.valid_positions()].tolist()]
+        return [
+            {
+                "Date": str(date),
+                "Time": f"{time:04d}",
+                "Status": status,
+                "Latitude": round(latitude, 1),
+                "Longitude": round(longitude, 1),
+                "Max_Wind_Speed": max_wind if max_wind > 0 else 0,
+                "Min_Pressure": min_pressure if min_pressure != MISSING and min_pressure >= 0 else None,
+            }
+            for (date, time, latitude, longitude, max_wind, min_pressure), status
+            in zip(self.points(), statuses)
+        ]
+
+    def to_dict(self):
+        """ Serialize to the storm JSON shape the frontend expects from /api/hurricanes. """
+        return {
+            "Basin": self.storm_id[:2],
+            "Cyclone_Number": self.storm_id[2:4],
+            "Year": self.storm_id[4:8],
+            "Name": self.name,
+            "Data_Count": len(self),
+            "Entries": self.entries(),
+        }
+
+
+# Function to iterate the storms of a track store, optionally only those from min_year onwards
+def iter_storms(store, min_year=None):
+    years = store.storms["year"]
+    positions = range(len(store)) if min_year is None else np.flatnonzero(years >= min_year).tolist()
+    for i in positions:
+        yield Storm.from_store(store, i)
+
+
+# Function to load every storm of a track store into a list
+def load_storms(store, min_year=None):
+    return list(iter_storms(store, min_year))
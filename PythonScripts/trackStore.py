@@ -0,0 +1,266 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+#-----------------------------------------------------------------------------------------------------------
+# This script builds a read-only binary track store from the parsed HURDAT2 data (hurricane_data.csv).
+# The store is a directory with two fixed-width record arrays saved as .npy files:
+#   tracks.npy - one record per track point, in file order
+#   storms.npy - one record per storm, with the offset and length of its rows in tracks.npy
+# Readers open the arrays with np.load(mmap_mode="r"), so every API worker or batch job on the box shares
+# the same pages from the OS page cache and no parsing happens at startup.
+# -----------------------------------------------------------------------------------------------------------
+
+# The parsed CSV created by parseHurricaneData.py
+INPUT_CSV_FILE = "PythonScripts/hurricane_data.csv"
+
+# The directory the binary store is written to
+TRACK_STORE_DIR = "PythonScripts/track_store"
+
+TRACKS_FILE = "tracks.npy"
+STORMS_FILE = "storms.npy"
+META_FILE = "meta.json"
+
+# Bump this whenever TRACK_DTYPE or STORM_DTYPE changes so old stores are rejected instead of misread
+STORE_FORMAT_VERSION = 2
+
+# HURDAT2 uses -999 for missing values, we keep the same sentinel in the integer columns
+MISSING = -999
+
+# Wind radii columns in the order they are stored in the "radii" field (34kt, 50kt, 64kt x NE, SE, SW, NW)
+RADII_COLUMNS = [
+    "34kt_NE", "34kt_SE", "34kt_SW", "34kt_NW",
+    "50kt_NE", "50kt_SE", "50kt_SW", "50kt_NW",
+    "64kt_NE", "64kt_SE", "64kt_SW", "64kt_NW",
+]
+
+# Fixed-width layout of a single track point
+TRACK_DTYPE = np.dtype([
+    ("date", "<i4"),              # YYYYMMDD
+    ("time", "<i2"),              # HHMM (UTC)
+    ("indicator", "S1"),          # Record identifier, e.g. b"L" for landfall
+    ("status", "S2"),             # TD, TS, HU, EX, ...
+    ("latitude", "<f4"),          # Decimal degrees, north positive
+    ("longitude", "<f4"),         # Decimal degrees in [-180, 180], east positive
+    ("max_wind", "<i2"),          # Knots
+    ("min_pressure", "<i2"),      # Millibars
+    ("radii", "<i2", (len(RADII_COLUMNS),)),
+    ("radius_max_wind", "<i2"),   # Nautical miles
+])
+
+# Fixed-width layout of the storm offset table
+STORM_DTYPE = np.dtype([
+    ("storm_id", "S8"),           # ATCF id, e.g. b"AL061900"
+    ("name", "S16"),
+    ("year", "<i2"),
+    ("basin", "S2"),              # AL, EP, CP, ...
+    ("source", "<i2"),            # Index into the "sources" list of meta.json
+    ("start", "<i8"),             # Offset of the first row in tracks.npy
+    ("count", "<i4"),             # Number of rows belonging to the storm
+])
+
+
+# Function to convert a column of '28.0N' / '94.8W' strings to signed decimal degrees in one pass
+# Values that are already numeric (or numeric strings without a hemisphere) are returned unchanged,
+# so the function can be applied to the raw HURDAT2 columns as well as to the extractor outputs
+def decode_coordinates(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    values = values.astype(str).str.strip()
+    hemisphere = values.str[-1]
+    has_hemisphere = hemisphere.isin(["N", "S", "E", "W"])
+    numbers = pd.to_numeric(values.where(~has_hemisphere, values.str[:-1]), errors="coerce")
+    # Convert S and W to negative since they represent southern and western hemispheres
+    negative = hemisphere.isin(["S", "W"])
+    return numbers.where(~negative, -numbers)
+
+
+# Function to wrap longitudes into the range of -180 to 180
+def wrap_longitudes(longitudes):
+    return ((longitudes + 180.0) % 360.0) - 180.0
+
+
+# Function to convert a column to a fixed-width integer column, using the HURDAT2 sentinel for gaps
+def to_int_column(values, dtype):
+    numbers = pd.to_numeric(values, errors="coerce").fillna(MISSING)
+    return numbers.to_numpy().astype(dtype)
+
+
+# Function to convert the date (YYYYMMDD) and time (HHMM) columns to minutes since 1970-01-01, arithmetically
+# Dates or times that are missing (the -999 sentinel) or impossible give NaN instead of raising
+def track_minutes(dates, times):
+    dates = np.asarray(dates, dtype=np.int64)
+    times = np.asarray(times, dtype=np.int64)
+    year, month, day = dates // 10000, dates // 100 % 100, dates % 100
+    valid_month = (month >= 1) & (month <= 12)
+    month_start = np.datetime64("1970-01", "M") + ((year - 1970) * 12 + np.where(valid_month, month - 1, 0))
+    first_day = month_start.astype("datetime64[D]").astype(np.int64)
+    month_days = (month_start + 1).astype("datetime64[D]").astype(np.int64) - first_day
+    valid = valid_month & (day >= 1) & (day <= month_days) & (times >= 0) & (times < 2400) & (times % 100 < 60)
+    minutes = (first_day + day - 1) * 1440 + (times // 100) * 60 + times % 100
+    return np.where(valid, minutes, np.nan)
+
+
+# Function to convert a column to fixed-width bytes, with missing values stored as empty bytes
+def to_bytes_column(values, dtype):
+    return values.fillna("").astype(str).str.strip().to_numpy().astype(dtype)
+
+
+# Function to build the record arrays from a DataFrame with the hurricane_data.csv columns
+def build_arrays(df):
+    tracks = np.zeros(len(df), dtype=TRACK_DTYPE)
+    tracks["date"] = to_int_column(df["Date"], np.int32)
+    tracks["time"] = to_int_column(df["Time"], np.int16)
+    tracks["indicator"] = to_bytes_column(df["Indicator"], "S1")
+    tracks["status"] = to_bytes_column(df["Status"], "S2")
+    tracks["latitude"] = decode_coordinates(df["Latitude"]).to_numpy(dtype=np.float32)
+    tracks["longitude"] = wrap_longitudes(decode_coordinates(df["Longitude"])).to_numpy(dtype=np.float32)
+    tracks["max_wind"] = to_int_column(df["Max_Wind_Speed"], np.int16)
+    tracks["min_pressure"] = to_int_column(df["Min_Pressure"], np.int16)
+    for i, column in enumerate(RADII_COLUMNS):
+        if column in df:
+            tracks["radii"][:, i] = to_int_column(df[column], np.int16)
+        else:
+            tracks["radii"][:, i] = MISSING
+    if "Radius_Max_Wind" in df:
+        tracks["radius_max_wind"] = to_int_column(df["Radius_Max_Wind"], np.int16)
+    else:
+        tracks["radius_max_wind"] = MISSING
+
+    # Rows ingested from several files carry a "Source" column, otherwise everything comes from one source
+    if "Source" in df:
+        source_codes, sources = pd.factorize(df["Source"])
+        sources = list(sources)
+    else:
+        source_codes, sources = np.zeros(len(df), dtype=int), [None]
+
+    # A new storm starts wherever the ATCF id or the source changes, the rows of a storm are contiguous
+    # The "Basin" column of hurricane_data.csv holds the full ATCF id (e.g. AL061900)
+    storm_ids = df["Basin"].astype(str).to_numpy()
+    changed = (storm_ids[1:] != storm_ids[:-1]) | (source_codes[1:] != source_codes[:-1])
+    boundaries = np.flatnonzero(np.r_[True, changed])
+    counts = np.diff(np.r_[boundaries, len(df)])
+
+    storms = np.zeros(len(boundaries), dtype=STORM_DTYPE)
+    storms["storm_id"] = storm_ids[boundaries].astype("S8")
+    storms["name"] = to_bytes_column(df["Name"].iloc[boundaries], "S16")
+    storms["year"] = tracks["date"][boundaries] // 10000
+    storms["basin"] = storms["storm_id"].astype("S2")
+    storms["source"] = source_codes[boundaries]
+    storms["start"] = boundaries
+    storms["count"] = counts
+    return tracks, storms, sources
+
+
+# Function to save an array next to its final path and move it into place, so readers never see a partial file
+def _save_atomic(path, array):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        np.save(file, array)
+    os.replace(temp_path, path)
+
+
+def write_track_store(df, store_dir=TRACK_STORE_DIR, source=None):
+    """ Write the binary track store for a parsed HURDAT2 DataFrame and return its metadata. """
+    tracks, storms, sources = build_arrays(df)
+    if sources == [None]:
+        sources = [source]
+    os.makedirs(store_dir, exist_ok=True)
+    _save_atomic(os.path.join(store_dir, TRACKS_FILE), tracks)
+    _save_atomic(os.path.join(store_dir, STORMS_FILE), storms)
+
+    meta = {
+        "format_version": STORE_FORMAT_VERSION,
+        "rows": int(len(tracks)),
+        "storms": int(len(storms)),
+        "sources": sources,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    temp_meta = os.path.join(store_dir, f"{META_FILE}.{os.getpid()}.tmp")
+    with open(temp_meta, "w") as file:
+        json.dump(meta, file, indent=2)
+    os.replace(temp_meta, os.path.join(store_dir, META_FILE))
+    return meta
+
+
+class TrackStore:
+    """ Read-only, memory-mapped view of a track store directory. """
+
+    def __init__(self, store_dir=TRACK_STORE_DIR):
+        with open(os.path.join(store_dir, META_FILE)) as file:
+            self.meta = json.load(file)
+        if self.meta.get("format_version") != STORE_FORMAT_VERSION:
+            raise ValueError(
+                f"Track store {store_dir} has format version {self.meta.get('format_version')}, "
+                f"expected {STORE_FORMAT_VERSION}; rebuild it with trackStore.py"
+            )
+        self.store_dir = store_dir
+        self.tracks = np.load(os.path.join(store_dir, TRACKS_FILE), mmap_mode="r")
+        self.storms = np.load(os.path.join(store_dir, STORMS_FILE), mmap_mode="r")
+        self._storm_index = None
+        self._row_storm = None
+        self._minutes = None
+
+    def __len__(self):
+        return len(self.storms)
+
+    def column(self, name):
+        """ Zero-copy view of one track column across all storms. """
+        return self.tracks[name]
+
+    def storm_rows(self, i):
+        """ Zero-copy view of the track records of the i-th storm. """
+        start = int(self.storms["start"][i])
+        return self.tracks[start:start + int(self.storms["count"][i])]
+
+    def find(self, storm_id):
+        """ Position of a storm in the offset table, or None if the id is unknown.
+
+        When several sources carry the same storm, the first one ingested wins.
+        """
+        if self._storm_index is None:
+            ids = self.storms["storm_id"].tolist()
+            self._storm_index = {}
+            for i, known_id in enumerate(ids):
+                self._storm_index.setdefault(known_id.decode(), i)
+        return self._storm_index.get(storm_id)
+
+    def select(self, basin=None, source=None):
+        """ Positions of the storms from one basin and/or one source in the offset table. """
+        mask = np.ones(len(self.storms), dtype=bool)
+        if basin is not None:
+            mask &= self.storms["basin"] == basin.encode()
+        if source is not None:
+            mask &= self.storms["source"] == self.meta["sources"].index(source)
+        return np.flatnonzero(mask)
+
+    def row_storm(self):
+        """ Storm position of every track row, handy for vectorized group-bys across storms. """
+        if self._row_storm is None:
+            self._row_storm = np.repeat(np.arange(len(self.storms)), self.storms["count"])
+        return self._row_storm
+
+    def minutes(self):
+        """ Time of every track row in minutes since 1970 (float, NaN for an invalid date or time). """
+        if self._minutes is None:
+            self._minutes = track_minutes(self.tracks["date"], self.tracks["time"])
+        return self._minutes
+
+
+def open_track_store(store_dir=TRACK_STORE_DIR):
+    return TrackStore(store_dir)
+
+
+if __name__ == "__main__":
+
+    # Usage: python trackStore.py [input_csv] [store_dir]
+    input_csv = sys.argv[1] if len(sys.argv) > 1 else INPUT_CSV_FILE
+    store_dir = sys.argv[2] if len(sys.argv) > 2 else TRACK_STORE_DIR
+
+    df = pd.read_csv(input_csv, dtype=str)
+    meta = write_track_store(df, store_dir, source=os.path.basename(input_csv))
+    print(f"Track store with {meta['storms']} storms and {meta['rows']} rows saved to {store_dir}")
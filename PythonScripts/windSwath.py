@@ -0,0 +1,281 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage, finish_run
+from resampleTracks import resample_tracks
+from trackStore import STORMS_FILE, TRACKS_FILE, TRACK_STORE_DIR, open_track_store
+
+#-----------------------------------------------------------------------------------------------------------
+# Wind-field swaths from the HURDAT2 34/50/64 kt quadrant wind radii (available since 2004).
+# Every storm is resampled to a fine time step and, for every grid cell of the region, the swath records the
+# strongest wind threshold (34, 50 or 64 kt) whose radius in the cell's quadrant reached the cell.
+# All storms are resampled in one call, every track point is only tested against the cells within reach of its
+# largest radius, storms run in parallel in a process pool, and the swath cube (storms x rows x columns) is
+# cached on disk per track store version and grid.
+# -----------------------------------------------------------------------------------------------------------
+
+# Florida bounding box (lon_min, lat_min, lon_max, lat_max), the same limits the frontend map uses
+FLORIDA_BOUNDS = (-87.6, 24.5, -79.8, 31.0)
+
+# Grid resolution in degrees (0.05 degrees is roughly 3 miles)
+RESOLUTION = 0.05
+
+# Time step of the resampled tracks the swaths are built from, in minutes
+SWATH_STEP_MINUTES = 15
+
+# The radii are only given in HURDAT2 from 2004 onwards
+FIRST_RADII_YEAR = 2004
+
+# The directory cached swath cubes are saved to
+SWATH_CACHE_DIR = "swath_cache"
+
+EARTH_RADIUS_NM = 3440.065
+
+# Wind thresholds in knots, in the order of the radii groups of the track store
+THRESHOLDS = (34, 50, 64)
+
+class SwathGrid:
+    """ Regular latitude/longitude grid over a region, cell centers at half a step from the bounds. """
+
+    __slots__ = ("lon_min", "lat_min", "lon_max", "lat_max", "resolution", "nx", "ny")
+
+    def __init__(self, bounds=FLORIDA_BOUNDS, resolution=RESOLUTION):
+        self.lon_min, self.lat_min, self.lon_max, self.lat_max = bounds
+        self.resolution = resolution
+        self.nx = int(np.ceil((self.lon_max - self.lon_min) / resolution))
+        self.ny = int(np.ceil((self.lat_max - self.lat_min) / resolution))
+
+    @property
+    def shape(self):
+        return self.ny, self.nx
+
+    def axes(self):
+        """ Latitudes of the cell rows (from the south) and longitudes of the cell columns (from the west). """
+        lats = self.lat_min + (np.arange(self.ny) + 0.5) * self.resolution
+        lons = self.lon_min + (np.arange(self.nx) + 0.5) * self.resolution
+        return lats, lons
+
+    def centers(self):
+        """ Flattened (latitudes, longitudes) of the cell centers, row by row from the south. """
+        lats, lons = self.axes()
+        lon_grid, lat_grid = np.meshgrid(lons, lats)
+        return lat_grid.ravel(), lon_grid.ravel()
+
+    def window(self, latitude, longitude, radius):
+        """ Row and column slices of the cells whose centers can lie within radius (nm) of a point. """
+        reach = radius / EARTH_RADIUS_NM
+        lat_reach = np.degrees(reach)
+        # Widest longitude span of a circle of that radius, a cell of margin on every side absorbs rounding
+        cos_lat = np.cos(np.radians(latitude))
+        spread = np.sin(reach) / cos_lat if cos_lat > 0 else np.inf
+        lon_reach = np.degrees(np.arcsin(spread)) if reach < np.pi / 2 and spread < 1 else 180.0
+
+        def cells(low, high, origin, count):
+            first = int(np.floor((low - origin) / self.resolution - 0.5))
+            last = int(np.floor((high - origin) / self.resolution - 0.5)) + 2
+            return slice(min(max(first, 0), count), min(max(last, 0), count))
+
+        return (cells(latitude - lat_reach, latitude + lat_reach, self.lat_min, self.ny),
+                cells(longitude - lon_reach, longitude + lon_reach, self.lon_min, self.nx))
+
+    def to_dict(self):
+        return {
+            "bounds": [self.lon_min, self.lat_min, self.lon_max, self.lat_max],
+            "resolution": self.resolution,
+        }
+
+
+# Function to compute great-circle distances (nautical miles) and initial bearings (degrees) from points to cells
+# The inputs broadcast, so (K, 1) points against (1, C) cells give K x C matrices
+def distance_and_bearing(point_lat, point_lon, cell_lat, cell_lon):
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (point_lat, point_lon, cell_lat, cell_lon))
+    delta_lon = lon2 - lon1
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(delta_lon / 2) ** 2
+    distance = 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    y = np.sin(delta_lon) * np.cos(lat2)
+    x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(delta_lon)
+    bearing = np.degrees(np.arctan2(y, x)) % 360.0
+    return distance, bearing
+
+
+# Function to find the track points whose largest wind radius can reach the grid at all
+def points_near_grid(grid, latitudes, longitudes, radii):
+    nearest_lat = np.clip(latitudes, grid.lat_min, grid.lat_max)
+    nearest_lon = np.clip(longitudes, grid.lon_min, grid.lon_max)
+    distance, _ = distance_and_bearing(latitudes, longitudes, nearest_lat, nearest_lon)
+    return distance <= radii.max(axis=1)
+
+
+def swath_from_points(grid, latitudes, longitudes, radii):
+    """ Strongest threshold (0, 34, 50 or 64) reached in every cell by a set of track points. """
+    cell_lat, cell_lon = grid.axes()
+    swath = np.zeros(grid.shape, dtype=np.uint8)
+
+    # Points without radii (before 2004, or not analysed) cannot contribute
+    valid = (radii >= 0).all(axis=1)
+    latitudes, longitudes, radii = latitudes[valid], longitudes[valid], radii[valid]
+    if len(latitudes):
+        near = points_near_grid(grid, latitudes, longitudes, radii)
+        latitudes, longitudes, radii = latitudes[near], longitudes[near], radii[near]
+
+    # Each point only needs the cells inside the bounding box of its largest radius, a view into the swath
+    for latitude, longitude, point_radii in zip(latitudes.tolist(), longitudes.tolist(), radii):
+        rows, columns = grid.window(latitude, longitude, point_radii.max())
+        if rows.start == rows.stop or columns.start == columns.stop:
+            continue
+        distance, bearing = distance_and_bearing(latitude, longitude, cell_lat[rows, None], cell_lon[None, columns])
+
+        # Quadrants in the order of the radii columns: NE, SE, SW, NW
+        quadrant = np.minimum((bearing // 90).astype(np.int64), 3)
+        window = swath[rows, columns]
+        for level, threshold in enumerate(THRESHOLDS):
+            radius = point_radii[level * 4:(level + 1) * 4][quadrant]
+            reached = (distance <= radius) & (radius > 0)
+            window[reached] = np.maximum(window[reached], threshold)
+
+    return swath
+
+
+def _storm_swath_task(args):
+    latitudes, longitudes, radii, bounds, resolution = args
+    return swath_from_points(SwathGrid(bounds, resolution), latitudes, longitudes, radii)
+
+
+# Function to fingerprint the track store contents and the swath parameters for the cache file name
+def cache_key(store_dir, storms, grid, step_minutes):
+    digest = hashlib.sha256()
+    for name in (TRACKS_FILE, STORMS_FILE):
+        with open(os.path.join(store_dir, name), "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+    digest.update(json.dumps({"grid": grid.to_dict(), "step": step_minutes}, sort_keys=True).encode())
+    digest.update(np.asarray(storms, dtype=np.int64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def compute_swaths(store_dir=TRACK_STORE_DIR, storms=None, grid=None, step_minutes=SWATH_STEP_MINUTES,
+                   workers=None, cache_dir=SWATH_CACHE_DIR):
+    """ Swath cube (storms x rows x columns, uint8 thresholds) for the given storm positions, cached on disk. """
+    store = open_track_store(store_dir)
+    grid = grid or SwathGrid()
+    if storms is None:
+        storms = np.flatnonzero(store.storms["year"] >= FIRST_RADII_YEAR)
+    storms = np.asarray(storms, dtype=np.int64)
+
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"swaths_{cache_key(store_dir, storms, grid, step_minutes)}.npy")
+        if os.path.exists(cache_path):
+            return np.load(cache_path, mmap_mode="r")
+
+    # All storms are resampled in one vectorized call, every task gets the slice of points of its storm
+    resampled = resample_tracks(store, step_minutes, storms)
+    radii = resampled.radii.astype(np.float64)
+    points = {
+        storm: slice(start, start + count)
+        for storm, start, count in zip(resampled.storm[resampled.start].tolist(), resampled.start.tolist(),
+                                       resampled.count.tolist())
+    }
+    bounds = (grid.lon_min, grid.lat_min, grid.lon_max, grid.lat_max)
+    tasks = []
+    for storm in storms.tolist():
+        rows = points.get(storm, slice(0, 0))
+        tasks.append((resampled.latitude[rows], resampled.longitude[rows], radii[rows], bounds, grid.resolution))
+    if workers == 1 or len(tasks) < 2:
+        swaths = [_storm_swath_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            swaths = list(pool.map(_storm_swath_task, tasks, chunksize=max(1, len(tasks) // 64)))
+    cube = np.stack(swaths) if swaths else np.zeros((0,) + grid.shape, dtype=np.uint8)
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            np.save(file, cube)
+        os.replace(temp_path, cache_path)
+    return cube
+
+
+def footprint_polygon(swath, grid, threshold=64):
+    """ Footprint of one storm swath at a threshold, as the union of the grid cells that reached it. """
+    import shapely
+
+    rows, columns = np.nonzero(swath >= threshold)
+    lon0 = grid.lon_min + columns * grid.resolution
+    lat0 = grid.lat_min + rows * grid.resolution
+    cells = shapely.box(lon0, lat0, lon0 + grid.resolution, lat0 + grid.resolution)
+    return shapely.union_all(cells)
+
+
+def cell_polygon_index(grid, polygons):
+    """ Index of the polygon containing each grid cell center (-1 outside all of them), computed once per grid. """
+    import shapely
+
+    cell_lat, cell_lon = grid.centers()
+    index = np.full(len(cell_lat), -1, dtype=np.int64)
+    tree = shapely.STRtree(polygons)
+    cells, matches = tree.query(shapely.points(cell_lon, cell_lat), predicate="within")
+    index[cells] = matches
+    return index
+
+
+def polygon_max_wind(cube, cell_index, polygon_names, storm_ids):
+    """ Strongest threshold every storm reached in every polygon, as a storms x polygons DataFrame. """
+    inside = cell_index >= 0
+    flat = cube.reshape(len(cube), -1)[:, inside]
+    result = np.zeros((len(cube), len(polygon_names)), dtype=np.uint8)
+    for i in range(len(cube)):
+        np.maximum.at(result[i], cell_index[inside], flat[i])
+    return pd.DataFrame(result, index=pd.Index(storm_ids, name="Storm_Id"), columns=polygon_names)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build wind swaths from the HURDAT2 quadrant wind radii.")
+    parser.add_argument("--store", default=TRACK_STORE_DIR, help="Track store directory")
+    parser.add_argument("--min-year", type=int, default=FIRST_RADII_YEAR)
+    parser.add_argument("--bounds", type=float, nargs=4, default=FLORIDA_BOUNDS,
+                        metavar=("LON_MIN", "LAT_MIN", "LON_MAX", "LAT_MAX"))
+    parser.add_argument("--resolution", type=float, default=RESOLUTION, help="Cell size in degrees")
+    parser.add_argument("--step", type=int, default=SWATH_STEP_MINUTES, help="Track resampling step in minutes")
+    parser.add_argument("--workers", type=int, help="Number of processes (default: CPU count)")
+    parser.add_argument("--polygons", help="Polygon layer (e.g. counties) to summarize the swaths by")
+    parser.add_argument("--name-field", default="NAME", help="Attribute holding the polygon names")
+    parser.add_argument("--output", default="wind_swaths.csv", help="CSV file for the summary")
+    args = parser.parse_args()
+
+    store = open_track_store(args.store)
+    grid = SwathGrid(tuple(args.bounds), args.resolution)
+    storms = np.flatnonzero(store.storms["year"] >= args.min_year)
+    storm_ids = store.storms["storm_id"][storms].astype(str)
+
+    with stage("swaths", rows=len(storms)):
+        cube = compute_swaths(args.store, storms, grid, args.step, args.workers)
+
+    if args.polygons:
+        import geopandas as gpd
+
+        with stage("load_polygons"):
+            layer = gpd.read_file(args.polygons).to_crs("EPSG:4326")
+        with stage("assign_cells"):
+            cell_index = cell_polygon_index(grid, layer.geometry.values)
+        with stage("aggregate", rows=len(storms)):
+            summary = polygon_max_wind(cube, cell_index, layer[args.name_field].tolist(), storm_ids)
+    else:
+        # Without a polygon layer, report the area (in cells) each storm covered at every threshold
+        summary = pd.DataFrame(
+            {f"Cells_{threshold}kt": (cube >= threshold).reshape(len(cube), -1).sum(axis=1) for threshold in THRESHOLDS},
+            index=pd.Index(storm_ids, name="Storm_Id"),
+        )
+
+    summary.to_csv(args.output)
+    print(f"Swaths of {len(storms)} storms summarized in {args.output}")
+    finish_run("windSwath")